@@ -109,7 +109,11 @@ if __name__ == "__main__":
         if analyze_this_calibration(calibration):
             input_timestamps_and_categorize(calibration)
 
-    cal_series = CalibrationSeries()
+    if (CALIBRATION_DIR / "TREND.json").exists():
+        # only reads the new calibrations, and starts from the saved fit:
+        cal_series = CalibrationSeries.load(update_c_id_list=True)
+    else:
+        cal_series = CalibrationSeries()
     cal_series.fit_exponential(ax="new")
     plt.savefig(CALIBRATION_DIR / "calibrations over time.png")
     plt.show()
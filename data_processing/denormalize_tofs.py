@@ -0,0 +1,12 @@
+"""Store each TOF's sample_name, m_id, date, and element in its own file.
+
+all_tofs() looks these up in the experiment and measurement tables, and saving the
+TOFs puts them in the tofs table so that a TOF opened on its own doesn't need to
+open its experiment either.
+"""
+from pyOER.tof import all_tofs
+
+for tof in all_tofs():
+    print(f"-------- Saving: '{tof}' ----------")
+    tof.fill_metadata()
+    tof.save()
@@ -1,19 +1,12 @@
 """This script updates measurements with the metadata I manually read from elog"""
 
 from pathlib import Path
-from pyOER.elog import ElogEntry, read_elog_html
+from pyOER.elog import save_elog_html
 
 ELOG_FILE = Path("../notes/full_NOTES_cinfelog.html")
 METADATA_DOC = Path("../notes/metadata_from_elog.txt")
 
 if __name__ == "__main__":
-    elog_entries = read_elog_html(ELOG_FILE)
-    for elog_entry in elog_entries:
-        number = elog_entry.number
-        try:
-            elog_entry_0 = ElogEntry.open(number)
-        except FileNotFoundError:
-            pass
-        else:
-            elog_entry.update_with(elog_entry_0)
-        elog_entry.SAVE()
+    # saves each entry as it is read, updated with what's already saved for it
+    N_saved = save_elog_html(ELOG_FILE)
+    print(f"saved {N_saved} elog entries from {ELOG_FILE}")
@@ -1,23 +1,17 @@
 import pyOER.calc
 
-if True:  # ALL of them!!!
-    from pyOER.tof import all_tofs
+if __name__ == "__main__":  # needed for the worker processes on Windows
+    if True:  # ALL of them!!!
+        from pyOER.tof import recalculate_all
 
-    for tof in all_tofs():
-        print(f"-------- Working on: '{tof}' ----------")
-        tof.calc_rate()
-        if tof.tof_type == "activity":
-            tof.calc_tof()
-            tof.calc_faradaic_efficiency()
-        tof.save()
-        del tof
+        recalculate_all()
 
-else:  # something specific:
-    from pyOER import ActExperiment
+    else:  # something specific:
+        from pyOER import ActExperiment
 
-    exp = ActExperiment.open(54)
-    for tof in exp.open(54).tofs:
-        tof.calc_rate()
-        tof.calc_tof()
-        tof.calc_current()
-        tof.save()
+        exp = ActExperiment.open(54)
+        for tof in exp.open(54).tofs:
+            tof.calc_rate()
+            tof.calc_tof()
+            tof.calc_current()
+            tof.save()
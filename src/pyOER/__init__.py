@@ -1,28 +1,134 @@
 __version__ = "0.0.1"
 
-# Module utilizes internal functions only available from V3.6+
+# Module utilizes internal functions only available from V3.7+
+import importlib
+import importlib.util
+import os
 import sys
 
 major, minor = sys.version_info.major, sys.version_info.minor
-if major < 3 or (major > 2 and minor < 6):
+if major < 3 or (major > 2 and minor < 7):
     raise SystemError(
-        "This module requires python3.6 or newer. You are using {}.{}".format(
+        "This module requires python3.7 or newer. You are using {}.{}".format(
             major, minor
         )
     )
-else:
+
+# The version prints are opt-in: set the environment variable PYOER_VERBOSE to see them
+VERBOSE = bool(os.environ.get("PYOER_VERBOSE"))
+if VERBOSE:
     print("Python version check: ok")
+    # Use old formatting syntax to prevent a SyntaxError from running above check
+    print("importing pyOER v{} from {}".format(__version__, __file__))
+
+# The submodules (and their dependencies like ixdat, EC_MS, matplotlib, and scipy) are
+#   only imported when one of their names is first used, e.g. pyOER.all_tofs imports
+#   only what the tof module needs. This replaces what used to be star imports of the
+#   submodules in this order, so any other name defined in one of them is found by
+#   importing them in turn (with the later ones taking precedence, as before).
+SUBMODULES = [
+    "elog",
+    "measurement",
+    "calibration",
+    "icpms",
+    "experiment",
+    "sample",
+    "tof",
+    "results_collections",
+    "modelling",
+]
+LAZY_NAMES = {
+    # elog
+    "read_elog_html": "elog",
+    "iter_elog_html": "elog",
+    "save_elog_html": "elog",
+    "all_elog_entries": "elog",
+    "ElogEntry": "elog",
+    "get_elog_index": "elog",
+    # measurement
+    "MeasurementCounter": "measurement",
+    "all_measurements": "measurement",
+    "Measurement": "measurement",
+    # calibration
+    "all_calibrations": "calibration",
+    "CalibrationCounter": "calibration",
+    "calibration_counter": "calibration",
+    "Calibration": "calibration",
+    "CalibrationSeries": "calibration",
+    # icpms
+    "ICPMSCounter": "icpms",
+    "ICPMSCalCounter": "icpms",
+    "all_icpms_points": "icpms",
+    "ICPMSPoint": "icpms",
+    "ICPMSCalibration": "icpms",
+    "get_icpms_calibration": "icpms",
+    # experiment
+    "get_calibration_series": "experiment",
+    "all_experiments": "experiment",
+    "all_standard_experiments": "experiment",
+    "get_all_dissolution_rates": "experiment",
+    "all_activity_experiments": "experiment",
+    "ExperimentCounter": "experiment",
+    "open_experiment": "experiment",
+    "Experiment": "experiment",
+    "StandardExperiment": "experiment",
+    "ActExperiment": "experiment",
+    # sample
+    "SAMPLE_TYPES": "sample",
+    "SAMPLE_ISOTOPES": "sample",
+    "get_element_and_type": "sample",
+    "get_isotope": "sample",
+    "Sample": "sample",
+    # tof
+    "TOFCounter": "tof",
+    "all_tofs": "tof",
+    "get_experiment_metadata": "tof",
+    "all_tof_sets": "tof",
+    "load_frame": "tof",
+    "recalculate_all": "tof",
+    "recalculate_experiment_tofs": "tof",
+    "calc_batched_rates": "tof",
+    "TOFFrame": "tof",
+    "TurnOverSet": "tof",
+    "TOFCollection": "tof",
+    "TurnOverFrequency": "tof",
+    # results_collections
+    "nested_update": "results_collections",
+    "nested_update_with_layers": "results_collections",
+    "get_sample_type": "results_collections",
+    "get_current_point": "results_collections",
+    "StabilityResultsCollection": "results_collections",
+    # modelling
+    "U0": "modelling",
+    "State": "modelling",
+    "get_states": "modelling",
+    # iss
+    "ISS": "iss",
+    # batch_save
+    "batch": "batch_save",
+}
+__all__ = list(LAZY_NAMES)
+
+
+def __getattr__(name):
+    """Import (on first use) and return the submodule or name from a submodule"""
+    if name.startswith("__"):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    if name in LAZY_NAMES:
+        value = getattr(importlib.import_module("." + LAZY_NAMES[name], __name__), name)
+    elif importlib.util.find_spec("." + name, __name__):
+        value = importlib.import_module("." + name, __name__)
+    else:
+        for module_name in reversed(SUBMODULES):
+            module = importlib.import_module("." + module_name, __name__)
+            if hasattr(module, name) and not name.startswith("_"):
+                value = getattr(module, name)
+                break
+        else:
+            raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value  # so that __getattr__ isn't needed for it next time
+    return value
+
 
-# Use old formatting syntax to prevent a SyntaxError from running above version check
-print("importing pyOER v{} from {}".format(__version__, __file__))
-
-from .elog import *
-from .measurement import *
-from .calibration import *
-from .icpms import *
-from .experiment import *
-from .sample import *
-from .tof import *
-from .results_collections import *
-from .modelling import *
-from .iss import ISS
+def __dir__():
+    return sorted(set(globals()) | set(LAZY_NAMES) | set(SUBMODULES))
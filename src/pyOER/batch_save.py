@@ -0,0 +1,163 @@
+"""This module lets many rows be saved together, as one atomic and durable write
+
+Scripts making many rows (e.g. TOFs) would otherwise write each file, and claim each
+new id from the counter file, one at a time. Instead:
+    >>> from pyOER import batch, TurnOverFrequency
+    >>> with batch():
+    ...     for ...:
+    ...         TurnOverFrequency(...).save()
+
+Within the batch:
+    - New id's are handed out from memory, from blocks of Batch.block_size id's
+      claimed from the counter file (see CounterWithFile.reserve()).
+    - save() of a TurnOverFrequency, Measurement, Experiment, ICPMSPoint, or
+      ICPMSCalibration only keeps the contents of its file in memory.
+When the batch is done, all of its files are first written to one journal file
+(BATCH_JOURNAL_FILE) with a single fsync, and then to the tables. The journal is
+deleted once the tables are synced to disk. If the process crashes in between, the
+next batch (or recover()) finishes writing the tables from the journal, so either all
+or none of the rows of a batch are saved. The id's claimed but not used are then
+given back. If the batch exits with an exception, nothing is written and all of its
+id's are given back (unless another process has claimed id's since).
+
+Rows saved in a batch are not in the tables (and can't be opened) until it is done.
+"""
+from contextlib import contextmanager
+from pathlib import Path
+import json
+import os
+
+from .constants import BATCH_JOURNAL_FILE
+from .tools import write_atomically, dump_json_atomically
+
+_active_batch = None  # the Batch of the current "with batch()", if any
+
+
+def get_active_batch():
+    """Return the Batch which saves are currently buffered in, or None"""
+    return _active_batch
+
+
+class Batch:
+    """The id's and files of the rows saved in a batch, before they are written"""
+
+    def __init__(self, journal_file=BATCH_JOURNAL_FILE, block_size=100):
+        """Initiate the batch
+
+        Args:
+            journal_file (Path-like): The file to write the batch to before the tables
+            block_size (int): The number of id's to claim at a time from a counter
+        """
+        self.journal_file = Path(journal_file)
+        self.block_size = block_size
+        self._files = {}  # {path_to_file: contents}, in order of first save
+        self._first_ids = {}  # {counter: first id handed out}
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(<{len(self)} files>)"
+
+    def __len__(self):
+        return len(self._files)
+
+    def new_id(self, counter):
+        """Return the next id of counter (a CounterWithFile), claiming a block if needed"""
+        new_id = counter.next_id(block_size=max(counter.block_size, self.block_size))
+        self._first_ids.setdefault(counter, new_id)
+        return new_id
+
+    def save_json(self, obj, path_to_file, **kwargs):
+        """Keep obj, as json (with kwargs for json.dumps), to be saved at path_to_file"""
+        self._files[str(path_to_file)] = json.dumps(obj, **kwargs)
+
+    def commit(self):
+        """Write the batch to the journal, then to the tables, then delete the journal"""
+        files = list(self._files.items())
+        if files:
+            dump_json_atomically({"files": files}, self.journal_file)
+            apply_journal(self.journal_file)
+        for counter in self._first_ids:
+            counter.release()  # the id's claimed but not used
+        self._files = {}
+        self._first_ids = {}
+
+    def abort(self):
+        """Forget the batch's files, and give back its id's"""
+        for counter, first_id in self._first_ids.items():
+            counter.release(first_id)
+        self._files = {}
+        self._first_ids = {}
+
+
+def apply_journal(journal_file=BATCH_JOURNAL_FILE):
+    """Write the files in the journal to the tables, sync, and delete the journal
+
+    Returns int: The number of files written
+    """
+    journal_file = Path(journal_file)
+    with open(journal_file, "r") as f:
+        files = json.load(f)["files"]
+    for path_to_file, contents in files:
+        write_atomically(path_to_file, lambda f: f.write(contents), fsync=False)
+    if hasattr(os, "sync"):
+        os.sync()
+    else:  # e.g. on Windows
+        for path_to_file, contents in files:
+            with open(path_to_file, "a") as f:
+                os.fsync(f.fileno())
+    journal_file.unlink()
+    return len(files)
+
+
+def recover(journal_file=BATCH_JOURNAL_FILE):
+    """Finish writing a batch which was interrupted (e.g. by a crash), if there is one
+
+    Returns int: The number of files written
+    """
+    if not Path(journal_file).exists():
+        return 0
+    print(f"WARNING!!! finishing the interrupted batch in {journal_file}")
+    return apply_journal(journal_file)
+
+
+@contextmanager
+def batch(journal_file=BATCH_JOURNAL_FILE):
+    """Context manager buffering saves and new id's, to write them all at the end
+
+    A batch inside another batch is part of the outer one. See the module docstring.
+
+    Args:
+        journal_file (Path-like): The file to write the batch to before the tables
+    """
+    global _active_batch
+    if _active_batch is not None:
+        yield _active_batch
+        return
+    recover(journal_file)
+    _active_batch = Batch(journal_file)
+    try:
+        yield _active_batch
+    except BaseException:
+        _active_batch.abort()
+        raise
+    else:
+        _active_batch.commit()
+    finally:
+        _active_batch = None
+
+
+def save_json(obj, path_to_file, atomic=False, **kwargs):
+    """Save obj as json at path_to_file, or keep it in the active batch if there is one
+
+    Args:
+        obj (dict): What to save, e.g. self.as_dict() of a row
+        path_to_file (Path-like): The file to save to
+        atomic (bool): Whether to write the file with dump_json_atomically()
+        kwargs (e.g. indent=4) are passed on to json.dump
+    """
+    if _active_batch is not None:
+        _active_batch.save_json(obj, path_to_file, **kwargs)
+    elif atomic:
+        dump_json_atomically(obj, path_to_file, **kwargs)
+    else:
+        with open(path_to_file, "w") as f:
+            json.dump(obj, f, **kwargs)
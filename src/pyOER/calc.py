@@ -1,15 +1,57 @@
 import numpy as np
 
 
+def calc_means_over_tspans(t, y, tspans):
+    """Return the mean of y over each tspan, with the boundaries included as in grab
+
+    For sorted t, this is done for all tspans at once from the cumulative sum of y,
+    with the boundaries of the tspans found by binary search.
+
+    Args:
+        t (np.array): The time vector
+        y (np.array): The values at the times in t
+        tspans (list of timespan): The time intervals to take the means over
+    Returns np.array: The means, nan for tspans with no data
+    """
+    t_starts = np.array([tspan[0] for tspan in tspans], dtype=float)
+    t_ends = np.array([tspan[-1] for tspan in tspans], dtype=float)
+    if np.any(np.diff(t) < 0):  # then binary search doesn't work
+        return np.array(
+            [np.mean(y[(t_0 <= t) & (t <= t_1)]) for t_0, t_1 in zip(t_starts, t_ends)]
+        )
+    y_cumsum = np.append(0, np.cumsum(y))
+    i_starts = np.searchsorted(t, t_starts, side="left")
+    i_ends = np.searchsorted(t, t_ends, side="right")
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (y_cumsum[i_ends] - y_cumsum[i_starts]) / (i_ends - i_starts)
+
+
+def calc_rates(experiment, tspans, mols=None):
+    """Return the average fluxes in [mol/s] of mols in the experiment over each tspan
+
+    The flux of each mol is grabbed once, and then averaged over all the tspans
+    together (see calc_means_over_tspans), rather than once per tspan.
+
+    Args:
+        experiment (Experiment): The experiment
+        tspans (list of timespan): The time intervals to get average fluxes for
+        mols (list of str): The mols (keys to experiment.mdict). Defaults to
+            experiment.mol_list
+    Returns dict: {mol: np.array of the average flux of mol over each tspan}
+    """
+    mols = mols or experiment.mol_list
+    meas = experiment.get_meas(tspans)
+    rates = {}
+    for mol in mols:
+        t, y = meas.grab_flux(experiment.mdict[mol], removebackground=True)
+        rates[mol] = calc_means_over_tspans(t, y, tspans)
+    return rates
+
+
 def calc_OER_rate(experiment, tspan, mol=None):
     """Return the total average flux of O2 in [mol/s] in the experiment over tspan"""
-    rate = 0
-    mol_list = [mol] if mol else experiment.mol_list
-    for mol in mol_list:
-        x, y = experiment.calc_flux(mol, tspan=tspan)
-        rate += np.mean(y)  # mean flux in [mol/s]
-
-    return rate
+    rates = calc_rates(experiment, [tspan], mols=[mol] if mol else None)
+    return sum(rates_of_mol[0] for rates_of_mol in rates.values())
 
 
 def calc_dissolution_rate(experiment, tspan, t_electrolysis=None):
@@ -21,62 +63,91 @@ def calc_dissolution_rate(experiment, tspan, t_electrolysis=None):
         t_electrolysis (float): if given, then assume dissolution only occurs over that
             length of time. I.e., divide the icpms_point amount by t_electrolysis.
     """
-    t_vec, n_vec = experiment.get_dissolution_points()
+    return calc_dissolution_rates_over_tspans(
+        experiment, [tspan], t_electrolysis=t_electrolysis
+    )[0]
+
 
-    i_before = int(np.argmax(t_vec > tspan[0])) - 1
-    i_after = int(np.argmax(t_vec > tspan[-1]))
+def calc_dissolution_rates_over_tspans(experiment, tspans, t_electrolysis=None):
+    """Return the average dissolution rate during each tspan in [mol/s]
+
+    The amount in each ICPMS sample is taken to have dissolved at a constant rate
+    since the previous sample (see StandardExperiment.get_dissolution_rates()). The
+    amount dissolved by time t is then a piecewise-linear curve through the cumulative
+    amounts at the sampling times. The amount dissolved during each tspan is the
+    difference of this curve at its ends, which are found for all tspans at once by
+    binary search.
+
+    Args:
+        experiment (StandardExperiment): the standard experiment
+        tspans (list of timespan): The time intervals for which to get average
+            dissolution rates, e.g. those of all the experiment's dissolution TOFs
+        t_electrolysis (float): if given, then assume dissolution only occurs over that
+            length of time. I.e., divide the amount of the first icpms_point after
+            each tspan by t_electrolysis.
+    Returns np.array: The rates, nan for tspans ending after the last ICPMS sample
+    """
+    t_vec, n_dot_vec = experiment.get_dissolution_rates()
+    t_starts = np.array([tspan[0] for tspan in tspans], dtype=float)
+    t_ends = np.array([tspan[-1] for tspan in tspans], dtype=float)
+    t_intervals = t_ends - t_starts
+    if not len(t_vec):
+        return np.full(len(tspans), np.nan)
+
+    t_knots = np.append(0, t_vec)  # the amount in each sample is from since the last
+    n_vec = n_dot_vec * np.diff(t_knots)  # the amount in each sample
+    # the number of samples taken at or before the start and end of each tspan:
+    i_starts = np.searchsorted(t_vec, t_starts, side="right")
+    i_ends = np.searchsorted(t_vec, t_ends, side="right")
+    after_last = i_ends >= len(t_vec)
+    i_ends = np.minimum(i_ends, len(t_vec) - 1)
 
-    t_interval = tspan[-1] - tspan[0]
     if t_electrolysis:
-        if i_after > i_before + 1:
+        sampled_during = (i_ends > i_starts) & ~after_last
+        if np.any(sampled_during):
+            tspan = tspans[int(np.argmax(sampled_during))]
             raise TypeError(
                 f"Can't adjust '{experiment}' at tspan={tspan} for t_electrolysis"
                 f"because the experiment has icpms samples taken during tspan"
             )
-        n_during_interval = n_vec[i_after] * t_interval / t_electrolysis
+        n_during_intervals = n_vec[i_ends] * t_intervals / t_electrolysis
     else:
-        if i_after > i_before + 1:
-            n_during_interval = (
-                n_vec[i_before + 1]
-                * (t_vec[i_before + 1] - tspan[0])
-                / (t_vec[i_before + 1] - t_vec[i_before])
-            )
-            for i in range(i_before + 2, i_after):
-                n_during_interval += n_vec[i]
-            n_during_interval += (
-                n_vec[i_after]
-                * (tspan[-1] - t_vec[i_after - 1])
-                / (t_vec[i_after] - t_vec[i_after - 1])
-            )
-        else:
-            n_during_interval = (
-                n_vec[i_after] * t_interval / (t_vec[i_after] - t_vec[i_after - 1])
-            )
+        n_cumulative = np.append(0, np.cumsum(n_vec))
 
-    return n_during_interval / t_interval
+        def cumulative_amount(t, i):
+            """The amount dissolved by t, where i samples are taken before t"""
+            t = np.maximum(t, 0)
+            return n_cumulative[i] + n_dot_vec[i] * (t - t_knots[i])
+
+        n_during_intervals = cumulative_amount(t_ends, i_ends) - cumulative_amount(
+            t_starts, np.minimum(i_starts, len(t_vec) - 1)
+        )
+    rates = n_during_intervals / t_intervals
+    rates[after_last] = np.nan
+    return rates
 
 
 def calc_exchange_rate(experiment, tspan):
     """Return the average rate of lattice O incorporation in O2 in [mol/s] over tspan"""
     beta = experiment.beta
-    x_32, y_32 = experiment.calc_flux("O2_M32", tspan=tspan)
-    x_34, y_34 = experiment.calc_flux("O2_M34", tspan=tspan)
-    return np.mean(y_34) - np.mean(y_32) * beta
+    rates = calc_rates(experiment, [tspan], mols=["O2_M32", "O2_M34"])
+    return rates["O2_M34"][0] - rates["O2_M32"][0] * beta
 
 
 def calc_potential(experiment, tspan):
     """Return the average potential vs RHE in [V] during the experiment over tspan"""
-    t, U = experiment.meas.grab("potential", tspan=tspan)
+    t, U = experiment.get_meas(tspan).grab("potential", tspan=tspan)
     return np.mean(U)
 
 
 def calc_current(experiment, tspan):
     """Return the average current in [A] during the experiment over tspan"""
-    t, I = experiment.meas.grab(experiment.meas.I_str, tspan=tspan)
-    I *= 1e-3  # [mA] -> [A]
     tspan_bg = experiment.tspan_bg_current
+    meas = experiment.get_meas([tspan, tspan_bg] if tspan_bg else tspan)
+    t, I = meas.grab(meas.I_str, tspan=tspan)
+    I *= 1e-3  # [mA] -> [A]
     if tspan_bg:
-        t_bg, I_bg = experiment.meas.grab(experiment.meas.I_str, tspan=tspan_bg)
+        t_bg, I_bg = meas.grab(meas.I_str, tspan=tspan_bg)
         I_bg *= 1e-3  # [mA] -> [A]
         I_bg = np.mean(I_bg)
     elif experiment.tspan_cap:
@@ -2,10 +2,8 @@
 
 from pathlib import Path
 import json
+import os
 import numpy as np
-from matplotlib import pyplot as plt
-from EC_MS.utils.extraction_class import Extraction
-from EC_MS import Chem
 from .measurement import Measurement
 from .constants import CALIBRATION_DIR, CALIBRATION_ID_FILE, PROJECT_START_TIMESTAMP
 from .tools import (
@@ -13,6 +11,7 @@ from .tools import (
     CounterWithFile,
     fit_exponential,
 )
+from .table_index import get_table_index
 
 
 if not CALIBRATION_DIR.exists():
@@ -120,12 +119,8 @@ class Calibration:
     def open(cls, c_id, calibration_dir=CALIBRATION_DIR):
         """Opens the measurement given its id"""
         try:
-            path_to_file = next(
-                path
-                for path in Path(calibration_dir).iterdir()
-                if path.stem.startswith(f"c{c_id}")
-            )
-        except StopIteration:
+            path_to_file = get_table_index(calibration_dir).get_path("c", c_id)
+        except FileNotFoundError:
             raise FileNotFoundError(f"no calibration with id = m{c_id}")
         return cls.load(path_to_file)
 
@@ -180,6 +175,8 @@ class Calibration:
 
     def cal_F_O2(self):
         """calibrate the O2 signal based on assumption of OER during self.tspan"""
+        from EC_MS import Chem
+
         Y_cum = 0
         for mass in ["M32", "M34", "M36"]:
             x, y = self.meas.grab_signal(
@@ -224,7 +221,7 @@ class Calibration:
 class CalibrationSeries:
     """A class to describe the trend of calibrations and predict F based on tstamp"""
 
-    def __init__(self, c_id_list=None, tau=None, y0=None, y1=None):
+    def __init__(self, c_id_list=None, tau=None, y0=None, y1=None, points=None):
         """Initiate with a list of calibration ids and, optionally, fit params
 
         Args:
@@ -233,13 +230,19 @@ class CalibrationSeries:
             tau (float): time constant for sensitivity factor convergence
             y0 (float): convergence value of sensitivity factor
             y1 (float): value of sensitivity factor at t=0
+            points (dict): {c_id: point} with the tstamp, F, isotope, and sample of
+                each calibration, as saved by a previous CalibrationSeries. See
+                get_calibration_points()
         """
         if not c_id_list:
-            c_id_list = [c.id for c in all_calibrations() if c.category == "good"]
+            from .query import ids
+
+            c_id_list = ids("calibrations", category="good")
         self.c_id_list = c_id_list
         self.tau = tau
         self.y0 = y0
         self.y1 = y1
+        self.points = {int(c_id): point for c_id, point in (points or {}).items()}
         # function: returns sensitivity factor given timestamp
         self._F_of_tstamp = None
 
@@ -249,6 +252,7 @@ class CalibrationSeries:
             "tau": self.tau,
             "y0": self.y0,
             "y1": self.y1,
+            "points": {str(c_id): point for c_id, point in self.points.items()},
         }
         return self_as_dict
 
@@ -258,9 +262,19 @@ class CalibrationSeries:
             json.dump(self_as_dict, f)
 
     @classmethod
-    def load(cls):
+    def load(cls, update_c_id_list=False):
+        """Load the CalibrationSeries saved in TREND.json
+
+        Args:
+            update_c_id_list (bool): Whether to use the calibrations now categorized
+                as "good" instead of the saved c_id_list. The saved points and fit
+                parameters are still used, so that only the new calibrations are
+                read and the fit starts from the saved one.
+        """
         with open(CALIBRATION_DIR / "TREND.json", "r") as f:
             self_as_dict = json.load(f)
+        if update_c_id_list:
+            self_as_dict.pop("c_id_list", None)
         return cls(**self_as_dict)
 
     def calibrations(self):
@@ -268,34 +282,94 @@ class CalibrationSeries:
         for c_id in self.c_id_list:
             yield Calibration.open(c_id)
 
-    def sensitivity_trend(self, ax="new"):
-        """return and plot the sensitivity factors vs time"""
+    def get_file_stamps(self, c_id, measurement):
+        """Return the [name, mtime, size] of the calibration's and the raw data's files
+
+        A calibration's point is only read again if one of these has changed.
+
+        Args:
+            c_id (int): The calibration's id
+            measurement (Measurement): The calibration's measurement
+        """
+        stamps = []
+        for get_path in [
+            lambda: get_table_index(CALIBRATION_DIR).get_path("c", c_id),
+            lambda: measurement.data_path,
+        ]:
+            try:
+                path_to_file = Path(get_path())
+                stat = os.stat(path_to_file)
+            except (FileNotFoundError, TypeError):
+                stamps.append(None)
+            else:
+                stamps.append([path_to_file.name, stat.st_mtime_ns, stat.st_size])
+        return stamps
+
+    def get_calibration_points(self, force=False):
+        """Return {c_id: point} for the calibrations, reading only new or changed ones
+
+        A point is a dict with the "tstamp", "F" (of O2), "isotope", and "sample" of
+        the calibration, and the "m_id" and "stamps" (see get_file_stamps()) it is
+        from. Getting the tstamp of a calibration can mean loading its measurement's
+        raw data, so the points are kept in self.points, and saved with the series in
+        TREND.json, to only open the calibrations which are new or have changed. The
+        measurements of the cached points are opened, but not their raw data.
+
+        Args:
+            force (bool): Whether to read all the calibrations again
+        """
+        points = {}
+        for c_id in self.c_id_list:
+            point = None if force else self.points.get(c_id)
+            if point:
+                measurement = Measurement.open(point["m_id"])
+                if point["stamps"] == self.get_file_stamps(c_id, measurement):
+                    point["sample"] = measurement.sample_name
+                    points[c_id] = point
+                    continue
+            calibration = Calibration.open(c_id)
+            measurement = calibration.measurement
+            points[c_id] = {
+                "tstamp": measurement.tstamp,
+                "F": calibration.F["O2"],
+                "isotope": calibration.isotope,
+                "sample": measurement.sample_name,
+                "m_id": calibration.m_id,
+                "stamps": self.get_file_stamps(c_id, measurement),
+            }
+        self.points = points
+        return points
+
+    def sensitivity_trend(self, ax="new", force=False):
+        """return and plot the sensitivity factors vs time
+
+        Args:
+            ax (Axis): where to plot. "new" for a new axis, None to not plot
+            force (bool): Whether to read all the calibrations again, instead of
+                using the cached points. See get_calibration_points()
+        """
+        from matplotlib import pyplot as plt
 
-        time_vec = np.array([])
-        F_vec = np.array([])
+        points = list(self.get_calibration_points(force=force).values())
+        time_vec = np.array([point["tstamp"] for point in points], dtype=float)
+        time_vec = time_vec - PROJECT_START_TIMESTAMP
+        F_vec = np.array([point["F"] for point in points], dtype=float)
 
         if ax == "new":
             fig, ax = plt.subplots()
             ax.set_xlabel("project time / [days]")
             ax.set_ylabel("O2 sensitivity / [C/mol]")
 
-        t_project_start = PROJECT_START_TIMESTAMP
-        for calibration in self.calibrations():
-
-            t = calibration.meas.tstamp - t_project_start
-            F = calibration.F["O2"]
-            time_vec = np.append(time_vec, t)
-            F_vec = np.append(F_vec, F)
-
-            if ax:
-                if calibration.isotope == 16:
+        if ax:
+            for t, F, point in zip(time_vec, F_vec, points):
+                if str(point["isotope"]) == "16":
                     color = "k"
-                elif calibration.isotope == 18:
+                elif str(point["isotope"]) == "18":
                     color = "g"
                 else:
                     color = "r"  # something's wrong
 
-                sample = calibration.measurement.sample_name
+                sample = point["sample"]
                 if sample == "Trimi1":
                     marker = "s"  # Platinum as squares
                 elif "Jazz" in sample or "Folk" in sample or "Emil" in sample:
@@ -327,10 +401,22 @@ class CalibrationSeries:
             return self.make_F_of_tstamp()
         return self._F_of_tstamp
 
-    def fit_exponential(self, ax="new"):
+    def fit_exponential(self, ax="new", warm_start=True):
+        """Fit the sensitivity trend with an exponential and return (tau, y0, y1)
+
+        Args:
+            ax (Axis): where to plot. "new" for a new axis, None to not plot
+            warm_start (bool): Whether to start the fit from the current tau, y0,
+                and y1 (e.g. as loaded from TREND.json), if they are there
+        """
+        from matplotlib import pyplot as plt
+
         time_vec, F_vec = self.sensitivity_trend(ax=ax)
 
-        tau, y0, y1 = fit_exponential(time_vec, F_vec)
+        p0 = None
+        if warm_start and None not in (self.tau, self.y0, self.y1):
+            p0 = [self.tau, self.y0, self.y1]
+        tau, y0, y1 = fit_exponential(time_vec, F_vec, p0=p0)
 
         if ax:
             ax = plt.gca()
@@ -1,4 +1,5 @@
 from pathlib import Path
+import os
 
 # -------------- natural constants -------------- #
 STANDARD_ALPHA = 0.99804  # the natural ratio ^{16}O/(^{16}O + ^{18}O) of oxygen atoms
@@ -34,7 +35,32 @@ EXPERIMENT_TAGS = {
 STANDARD_EXPERIMENT_TAGS = ["y", "k", "s", "c"]
 
 # -------------- table stuff (directories and counter files) -------------- #
-PROJECT_DIR = Path(__file__).absolute().parent.parent.parent
+# The environment variables PYOER_PROJECT_DIR and PYOER_DATA_DIR point pyOER to another
+#   project (tables/ and raw data), e.g. a synthetic one from tests/benchmarks/.
+#   Otherwise, the tables are in this repository and the data is at DATA_DIR as set in
+#   settings.py (see README.rst)
+PROJECT_DIR = Path(
+    os.environ.get("PYOER_PROJECT_DIR")
+    or Path(__file__).absolute().parent.parent.parent
+)
+if os.environ.get("PYOER_DATA_DIR"):
+    DATA_DIR = Path(os.environ["PYOER_DATA_DIR"])
+else:
+    try:
+        from .settings import DATA_DIR
+    except ImportError:
+        DATA_DIR = None  # modules using it raise an ImportError. See get_data_dir()
+
+
+def get_data_dir():
+    """Return DATA_DIR, or raise an ImportError explaining how to set it"""
+    if DATA_DIR is None:
+        raise ImportError(
+            "pyOER needs src/pyOER/settings.py to define DATA_DIR (see README.rst), "
+            "or the environment variable PYOER_DATA_DIR."
+        )
+    return DATA_DIR
+
 
 ELOG_DIR = PROJECT_DIR / "tables/elog"
 
@@ -56,6 +82,20 @@ EXPERIMENT_ID_FILE = EXPERIMENT_DIR / "LAST_EXPERIMENT_ID.pyOER20"
 TOF_DIR = PROJECT_DIR / "tables/tofs"
 TOF_ID_FILE = TOF_DIR / "LAST_TOF_ID.pyOER20"
 
+LEIS_DIR = PROJECT_DIR / "tables/leis"
+
+BATCH_JOURNAL_FILE = PROJECT_DIR / "tables/.batch_journal.json"
+# ^ where a batch (see batch_save.py) writes its saves before putting them in the tables
+
+# -------------- caching -------------- #
+MEAS_CACHE_MAX_BYTES = 2e9  # memory budget for loaded raw data, see meas_cache.py
+CALIBRATED_MEAS_DIR = PROJECT_DIR / "tables/.cache/calibrated_meas"
+# ^ where Experiment.meas is saved after calibration and background subtraction
+EXPERIMENT_RESULTS_DIR = PROJECT_DIR / "tables/.cache/experiment_results"
+# ^ where Experiment's F, alpha, and cap are saved with the inputs they're from. Not
+# next to the experiments' files, as the inputs include the mtime of the raw data
+# file, so the saved results only hold on the computer they were calculated on.
+
 AVOGADROS_CONSTANT = 6.02217e23  # [1/mol]
 FARADAY_CONSTANT = 96485  # [C/mol]
 GAS_CONSTANT = 8.31446  # [J/(mol*K)]
@@ -1,35 +1,52 @@
 """This module defines the ElogEntry and a function for parsing elog html
 See: https://elog.psi.ch/elog/
 
+The ElogIndex keeps the field data of all the saved elog entries in memory, with the
+numbers in the fields (e.g. RE_vs_RHE and Resistor) parsed, for Measurement.RE_vs_RHE
+and Measurement.R_Ohm.
+
 Made for DTU SurfCat's cinfelog by Soren B. Scott on July 29, 2020
 """
 from pathlib import Path
 import re
 import json
+import os
 from .constants import ELOG_DIR
+from .tools import FLOAT_MATCH
+from .table_index import get_table_index
+from .table_cache import get_table_cache
 
 SETUP = "ECMS"
 
-FIELD_NAME_MATCHER = r"""<th class="listtitle"><a.*>(.*)</a></th>"""
-ENTRY_NUMBER_MATCHER = (
+# the patterns are compiled once. Each is only searched for in lines containing its
+# marker, which is much faster than searching each line with each pattern.
+FIELD_NAME_MARKER = "listtitle"
+FIELD_NAME_MATCHER = re.compile(r"""<th class="listtitle"><a.*>(.*)</a></th>""")
+ENTRY_NUMBER_MARKER = 'type="checkbox"'
+ENTRY_NUMBER_MATCHER = re.compile(
     r"""<tr><td class="list1"><input type="checkbox" name="s[0-9]+" value="([0-9]+)">"""
 )
 FIELD_VALUES_START = r"""<td class="list1"""
-FIELD_VALUE_MATCHER = r"""<td class="list1".*">([^<>]*)<"""
-ENTRY_END_MATCHER = r"</pre></td></tr>"
+FIELD_VALUE_MATCHER = re.compile(r"""<td class="list1".*">([^<>]*)<""")
+ENTRY_END_MATCHER = r"</pre></td></tr>"  # a plain string, so just checked with "in"
 
 
-def read_elog_html(
-    path_to_elog_html,
-    setup=SETUP,
-):
-    """Return a list of ElogEntry's with data from the html file
+def iter_elog_html(path_to_elog_html, setup=SETUP, verbose=False):
+    """Yield ElogEntry's with data from the html file, one at a time as they are read
+
+    The file is read in one pass, a line at a time, so that only the entry being
+    read is in memory. Each line is handled according to the state of the parser:
+    reading the field names in the header, the field values of an entry, or its notes.
 
-    TODO: replace this with something using BeautifulSoup
+    Args:
+        path_to_elog_html (Path-like): The elog, exported from the elog as html
+        setup (str): The setup of the elog, e.g. "ECMS"
+        verbose (bool): Whether to print the field names and entry numbers
     """
-    elog_entries = []  # this is what we will return
     field_names = []  # this will list the metadata field_names specified in the elog
     n_elog = None  # this will be the elog entry number
+    field_values = []
+    field_data = None
     notes_lines = []
     notestext = False  # a boolean to indicate whether or not we're reading notes
     gotvalues = False  # a boolean to indicate whether or not we got the field values
@@ -43,69 +60,90 @@ def read_elog_html(
             except UnicodeDecodeError:
                 print(f"Error on line after line = {line}")
                 continue
-            elog_field_match = re.search(FIELD_NAME_MATCHER, line)
-            if elog_field_match:
-                # then this line names a field in the elog metadata
-                field_names += [elog_field_match.group(1)]
-                print(f"got field names = {field_names}")
-                # don't need to waste time on the rest. Move on to the next line:
-                continue
 
-            entry_number_match = re.search(ENTRY_NUMBER_MATCHER, line)
-            if entry_number_match:
-                # then this line starts a new entry and specifies its number
-                n_elog = int(entry_number_match.group(1))
-                field_values = [n_elog]  # the first field value is ID
-                print(f"working on entry number {n_elog}")
+            if FIELD_NAME_MARKER in line:
+                elog_field_match = FIELD_NAME_MATCHER.search(line)
+                if elog_field_match:
+                    # then this line names a field in the elog metadata
+                    field_names.append(elog_field_match.group(1))
+                    if verbose:
+                        print(f"got field names = {field_names}")
+                    continue
+            if ENTRY_NUMBER_MARKER in line:
+                entry_number_match = ENTRY_NUMBER_MATCHER.search(line)
+                if entry_number_match:
+                    # then this line starts a new entry and specifies its number
+                    n_elog = int(entry_number_match.group(1))
+                    field_values = [n_elog]  # the first field value is ID
+                    if verbose:
+                        print(f"working on entry number {n_elog}")
 
             if line.startswith(FIELD_VALUES_START):
                 # ... then this specifies the values of the fields. great.
                 # Dates get their own lines, but follow the same structure.
                 # This will not match the ID, since that line is broken in the html.
-                #     (html is disgusting)
                 field_strings = line.split("</td>")
                 if len(field_strings) > 1:  # will be the case if the line is real.
-                    # The last entry is just noise and I want to toss it:
-                    field_strings = field_strings[:-1]
-                    # print(f"getting values from = f{field_strings}")  # debugging
-                    # Now go through and use re to extract the value
-                    for field_string in field_strings:
-                        field_value_match = re.search(FIELD_VALUE_MATCHER, field_string)
+                    # The last entry is just noise, so it's tossed:
+                    for field_string in field_strings[:-1]:
+                        field_value_match = FIELD_VALUE_MATCHER.search(field_string)
                         if field_value_match:
                             field_values += list(field_value_match.groups())
                         else:
-                            field_values += [None]
-
+                            field_values.append(None)
                     gotvalues = True  # the next non-blank non-field line is notes
-
             elif gotvalues and line.strip():  # then we're done with the field values
-                # so we can package the field values
-                field_data = dict(zip(field_names, field_values))
-                # and get ready for notes
                 notestext = True
 
             if notestext:  # then add the line to the notes of the entry!
-                # notes = notes.join(line)  # <-- this leads to MemoryErrors :(
-                notes_lines += [line]
+                notes_lines.append(line)
 
-            entry_end_match = re.search(ENTRY_END_MATCHER, line)
-            if entry_end_match:
-                # Then we just put it together:
-                elog_entry = ElogEntry(
+            if ENTRY_END_MATCHER in line:
+                if gotvalues:
+                    field_data = dict(zip(field_names, field_values))
+                yield ElogEntry(
                     setup=setup,
                     number=n_elog,
                     field_data=field_data,
                     notes="".join(notes_lines),
                 )
-                # add the result to the list
-                elog_entries += [elog_entry]
                 # clear stored values and be fresh for next elog entry
                 notes_lines = []
                 field_values = []
                 notestext = False
                 gotvalues = False
 
-    return elog_entries
+
+def read_elog_html(path_to_elog_html, setup=SETUP, verbose=True):
+    """Return a list of ElogEntry's with data from the html file
+
+    For big elogs, use iter_elog_html() or save_elog_html() instead, which don't
+    keep all the entries in memory.
+    """
+    return list(iter_elog_html(path_to_elog_html, setup=setup, verbose=verbose))
+
+
+def save_elog_html(path_to_elog_html, setup=SETUP, elog_dir=ELOG_DIR, update=True):
+    """Save each ElogEntry in the html file as soon as it is read
+
+    Args:
+        path_to_elog_html (Path-like): The elog, exported from the elog as html
+        setup (str): The setup of the elog, e.g. "ECMS"
+        elog_dir (Path-like): The directory to save the elog entries in
+        update (bool): Whether to keep what's already saved for an entry. If True,
+            an entry which is already in elog_dir is updated with the saved entry's
+            (non-empty) attributes, and saved.
+
+    Returns int: The number of entries saved
+    """
+    saved_entries = dict(get_table_index(elog_dir).items(f"{setup} ")) if update else {}
+    n_saved = 0
+    for elog_entry in iter_elog_html(path_to_elog_html, setup=setup):
+        if elog_entry.number in saved_entries:
+            elog_entry.update_with(ElogEntry.load(saved_entries[elog_entry.number]))
+        elog_entry.save(elog_dir=elog_dir)
+        n_saved += 1
+    return n_saved
 
 
 def all_elog_entries(elog_dir=ELOG_DIR):
@@ -154,12 +192,8 @@ class ElogEntry:
     def open(cls, e_id, setup=SETUP, elog_dir=ELOG_DIR):
         """Open the elog entry given its id"""
         try:
-            path_to_file = next(
-                path
-                for path in Path(elog_dir).iterdir()
-                if path.stem.startswith(f"{setup} {e_id}")
-            )
-        except StopIteration:
+            path_to_file = get_table_index(elog_dir).get_path(f"{setup} ", e_id)
+        except FileNotFoundError:
             raise FileNotFoundError(f"no elog with number={e_id}")
         return cls.load(path_to_file)
 
@@ -204,3 +238,114 @@ class ElogEntry:
             elif value:
                 print(f"update is setting {attr} to {value}")
                 setattr(self, attr, value)
+
+
+NUMBER_MATCHER = re.compile(r"\s*(" + FLOAT_MATCH + ")")
+
+
+def parse_number(value):
+    """Return the number at the start of value, e.g. 0.715 for "0.715, uncalibrated"
+
+    Returns None if value is not a str starting with a number, e.g. "" or "Mon Jan 7"
+    """
+    if not isinstance(value, str):
+        return None
+    number_match = NUMBER_MATCHER.match(value)
+    if not number_match:
+        return None
+    return float(number_match.group(1))
+
+
+class ElogIndex:
+    """An index of the field data of the saved elog entries of a setup, by number
+
+    The numbers in the fields (see parse_number()) are parsed when the index is built
+    and kept as a column of floats for each field. The index is built from the elog
+    directory's TableCache on first use, and rebuilt when the directory changes.
+    """
+
+    def __init__(self, elog_dir=ELOG_DIR, setup=SETUP):
+        """Initiate the index. It is built on first use.
+
+        Args:
+            elog_dir (Path-like): The directory containing the elog entries' files
+            setup (str): The setup of the elog entries, e.g. "ECMS"
+        """
+        self.elog_dir = Path(elog_dir)
+        self.setup = setup
+        self._mtime = None  # the directory mtime at which the index was built
+        self._field_data = {}  # {number: field_data}
+        self._numbers = {}  # {field: {number: float}}
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.elog_dir}, setup={self.setup!r})"
+
+    def refresh(self, force=False):
+        """Rebuild the index if the directory has changed since it was last built"""
+        try:
+            mtime = os.stat(self.elog_dir).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if force or self._mtime is None or mtime != self._mtime:
+            self.build()
+            self._mtime = mtime
+
+    def build(self):
+        """Read the field data of each elog entry and parse the numbers in it"""
+        self._field_data = {}
+        self._numbers = {}
+        if not self.elog_dir.exists():
+            return
+        for number, path_to_file, self_as_dict in get_table_cache(self.elog_dir).rows(
+            f"{self.setup} "
+        ):
+            field_data = self_as_dict.get("field_data") or {}
+            self._field_data[number] = field_data
+            for field, value in field_data.items():
+                value = parse_number(value)
+                if value is not None:
+                    self._numbers.setdefault(field, {})[number] = value
+
+    def has_entry(self, number):
+        """Return whether there is a saved elog entry with the number"""
+        self.refresh()
+        return _to_int(number) in self._field_data
+
+    def get_field_data(self, number):
+        """Return the field data of the elog entry with the number, or None"""
+        self.refresh()
+        return self._field_data.get(_to_int(number))
+
+    def get_number(self, number, field):
+        """Return the number in the field of the elog entry, or None if there isn't one
+
+        Args:
+            number (int or str): The number of the elog entry
+            field (str): The name of the field, e.g. "RE_vs_RHE" or "Resistor"
+        """
+        self.refresh()
+        return self._numbers.get(field, {}).get(_to_int(number))
+
+    def get_numbers(self, field):
+        """Return {number: float} for the elog entries with a number in the field"""
+        self.refresh()
+        return dict(self._numbers.get(field, {}))
+
+
+def _to_int(number):
+    """Return number (e.g. an elog_number, which may be a str) as int, or None"""
+    try:
+        return int(number)
+    except (TypeError, ValueError):
+        return None
+
+
+_elog_indeces = {}  # {(elog_dir, setup): ElogIndex}, see get_elog_index()
+
+
+def get_elog_index(elog_dir=ELOG_DIR, setup=SETUP):
+    """Return the (shared) ElogIndex of the setup in elog_dir, making it if needed"""
+    key = (os.path.normcase(os.path.abspath(elog_dir)), setup)
+    if key not in _elog_indeces:
+        _elog_indeces[key] = ElogIndex(elog_dir, setup=setup)
+    return _elog_indeces[key]
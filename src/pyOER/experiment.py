@@ -11,35 +11,61 @@ excess lattice O. The StandardExperiment is only calibrated for O2, though at al
 three isotopes, and gets the calibration factor from the trend in the project's
 CalibrationSeries. """
 
-from pathlib import Path
+import hashlib
 import json
+import os
+import pickle
 import numpy as np
-from matplotlib import pyplot as plt
-from matplotlib import gridspec
-
-from ixdat.techniques.ec_ms import MSCalResult
 
 from .constants import (
     EXPERIMENT_DIR,
     EXPERIMENT_ID_FILE,
+    ICPMS_DIR,
     STANDARD_ALPHA,
     STANDARD_EXPERIMENT_TAGS,
     FARADAY_CONSTANT,
+    CALIBRATED_MEAS_DIR,
+    EXPERIMENT_RESULTS_DIR,
+)
+from .tools import (
+    singleton_decorator,
+    CounterWithFile,
+    write_atomically,
+    dump_json_atomically,
 )
-from .tools import singleton_decorator, CounterWithFile
+from .table_index import get_table_index
+from .table_cache import get_table_cache
+from .relation_index import get_relation_index
+from .batch_save import save_json
 from .measurement import Measurement
 from .calibration import CalibrationSeries
 from .calc import calc_current
+from .meas_cache import MeasCache
+
+_calibration_series = None  # loaded on first use, see get_calibration_series()
+
+
+def get_inputs_hash(inputs):
+    """Return a hash of inputs (a json-able dict) which changes if any input does"""
+    inputs_as_json = json.dumps(inputs, sort_keys=True, default=str)
+    return hashlib.sha1(inputs_as_json.encode()).hexdigest()
+
 
-calibration_series = CalibrationSeries.load()
+def get_calibration_series():
+    """Return the project's CalibrationSeries, loading it on first use"""
+    global _calibration_series
+    if not _calibration_series:
+        _calibration_series = CalibrationSeries.load()
+    return _calibration_series
 
 
 def all_experiments(experiment_dir=EXPERIMENT_DIR):
     """returns an iterator that yields experiments in order of their id"""
     N_experiments = ExperimentCounter().last()
-    for n in range(1, N_experiments):
+    table_cache = get_table_cache(experiment_dir)
+    for n, path_to_file, self_as_dict in table_cache.rows("e", N_experiments - 1):
         try:
-            measurement = Experiment.open(n, experiment_dir=experiment_dir)
+            measurement = Experiment.from_dict(self_as_dict)
         except FileNotFoundError as e:
             print(f"itermeasurement skipping {n} due to error = \n{e}")
         else:
@@ -48,11 +74,10 @@ def all_experiments(experiment_dir=EXPERIMENT_DIR):
 
 def all_standard_experiments(experiment_dir=EXPERIMENT_DIR):
     N_experiments = ExperimentCounter().last()
-    for n in range(1, N_experiments):
+    table_cache = get_table_cache(experiment_dir)
+    for n, path_to_file, self_as_dict in table_cache.rows("e", N_experiments - 1):
         try:
-            standard_experiment = StandardExperiment.open(
-                n, experiment_dir=experiment_dir
-            )
+            standard_experiment = StandardExperiment.from_dict(self_as_dict)
             if standard_experiment.experiment_type.startswith("a"):
                 # then it is an activity experiment
                 raise TypeError("wrong type of experiment")
@@ -64,9 +89,10 @@ def all_standard_experiments(experiment_dir=EXPERIMENT_DIR):
 
 def all_activity_experiments(experiment_dir=EXPERIMENT_DIR):
     N_experiments = ExperimentCounter().last()
-    for n in range(1, N_experiments):
+    table_cache = get_table_cache(experiment_dir)
+    for n, path_to_file, self_as_dict in table_cache.rows("e", N_experiments - 1):
         try:
-            activity_experiment = ActExperiment.open(n, experiment_dir=experiment_dir)
+            activity_experiment = ActExperiment.from_dict(self_as_dict)
             if not activity_experiment.experiment_type.startswith("a"):
                 raise TypeError("wrong type of experiment.")
         except (FileNotFoundError, TypeError) as e:
@@ -75,6 +101,113 @@ def all_activity_experiments(experiment_dir=EXPERIMENT_DIR):
             yield activity_experiment
 
 
+def calc_dissolution_rates(m_ids, t_vec, n_vec):
+    """Return the dissolution rates of ICPMS points, each since the previous sample
+
+    The points must be sorted by m_id and then (stably) by sampling time. As in
+    StandardExperiment.get_dissolution_rates(), points sampled at t=0 are skipped, and
+    of points of the same measurement sampled at the same time, only the first counts.
+
+    Args:
+        m_ids (np.array): The measurement id of each ICPMS point
+        t_vec (np.array): The sampling time of each ICPMS point in [s]
+        n_vec (np.array): The amount of the element in each ICPMS point in [mol]
+
+    Returns:
+        np.array of int: The indeces of the points with a dissolution rate
+        np.array: The dissolution rate of each of those points in [mol/s]
+        np.array of int: For each point, the index of the point that it is a
+            duplicate of, or -1 if it is not a duplicate
+    """
+    m_ids, t_vec, n_vec = np.asarray(m_ids), np.asarray(t_vec), np.asarray(n_vec)
+    sampled = np.flatnonzero(t_vec != 0)
+    m_sampled, t_sampled = m_ids[sampled], t_vec[sampled]
+    is_duplicate = np.zeros(len(sampled), dtype=bool)
+    is_duplicate[1:] = (m_sampled[1:] == m_sampled[:-1]) & (
+        t_sampled[1:] == t_sampled[:-1]
+    )
+    # the last point before each point which is not a duplicate:
+    i_first = np.maximum.accumulate(np.where(is_duplicate, 0, np.arange(len(sampled))))
+    duplicate_of = np.full(len(t_vec), -1)
+    duplicate_of[sampled[is_duplicate]] = sampled[i_first[is_duplicate]]
+
+    counted = sampled[~is_duplicate]
+    m_counted, t_counted = m_ids[counted], t_vec[counted]
+    t_previous = np.zeros(len(counted))
+    t_previous[1:] = np.where(m_counted[1:] == m_counted[:-1], t_counted[:-1], 0)
+    n_dot_vec = n_vec[counted] / (t_counted - t_previous)
+    return counted, n_dot_vec, duplicate_of
+
+
+def get_all_dissolution_rates(icpms_dir=ICPMS_DIR):
+    """Return the dissolution rates of all the standard experiments, in one pass
+
+    The ICPMS points are all read once, and their amounts calculated with one call
+    per calibration (see icpms.calc_amounts()). They are sorted (stably) by m_id and
+    sampling time, and the rates calculated for all of them at once, with
+    calc_dissolution_rates(). Points with "duplicate" in their description are left
+    out, as in Measurement.get_icpms_points().
+
+    Returns:
+        dict: {e_id: (t_vec, n_dot_vec)} for each standard experiment, as returned
+            by StandardExperiment.get_dissolution_rates()
+        list of dict: The ICPMS points which were skipped because another point from
+            the same measurement was sampled at the same time, as dict(m_id, i_id,
+            sampling_time, duplicate_of), where duplicate_of is the other's i_id.
+    """
+    from .icpms import all_icpms_points, calc_amounts
+    from .query import rows
+
+    icpms_points = [
+        icpms_point
+        for icpms_point in all_icpms_points(icpms_dir)
+        if "duplicate" not in (icpms_point.description or "")
+        and icpms_point.m_id is not None
+        and icpms_point.sampling_time is not None
+    ]
+    calibrated = [
+        i
+        for i, icpms_point in enumerate(icpms_points)
+        if icpms_point.ic_id is not None and icpms_point.ic_id > 0
+    ]
+    n_vec = np.full(len(icpms_points), np.nan)
+    n_vec[calibrated] = calc_amounts([icpms_points[i] for i in calibrated])[0]
+    m_ids = np.array([icpms_point.m_id for icpms_point in icpms_points], dtype=int)
+    t_vec = np.array(
+        [icpms_point.sampling_time for icpms_point in icpms_points], dtype=float
+    )
+    i_ids = np.array([icpms_point.id for icpms_point in icpms_points], dtype=int)
+
+    order = np.lexsort((t_vec, m_ids))  # stable, so points stay in order of id
+    m_ids, t_vec, n_vec, i_ids = m_ids[order], t_vec[order], n_vec[order], i_ids[order]
+    counted, n_dot_vec, duplicate_of = calc_dissolution_rates(m_ids, t_vec, n_vec)
+
+    rates_by_m_id = {}
+    m_counted = m_ids[counted]
+    m_id_values, starts = np.unique(m_counted, return_index=True)
+    ends = np.append(starts[1:], len(counted))
+    for m_id, start, end in zip(m_id_values, starts, ends):
+        rates_by_m_id[int(m_id)] = (t_vec[counted[start:end]], n_dot_vec[start:end])
+
+    rates = {}
+    for e_id, path_to_file, self_as_dict in rows(
+        "experiments", experiment_type_in=STANDARD_EXPERIMENT_TAGS
+    ):
+        rates[e_id] = rates_by_m_id.get(
+            self_as_dict["m_id"], (np.array([]), np.array([]))
+        )
+    duplicates = [
+        dict(
+            m_id=int(m_ids[i]),
+            i_id=int(i_ids[i]),
+            sampling_time=float(t_vec[i]),
+            duplicate_of=int(i_ids[duplicate_of[i]]),
+        )
+        for i in np.flatnonzero(duplicate_of >= 0)
+    ]
+    return rates, duplicates
+
+
 @singleton_decorator
 class ExperimentCounter(CounterWithFile):
     """Counts measurements. 'id' increments the counter. 'last()' retrieves last id"""
@@ -84,15 +217,7 @@ class ExperimentCounter(CounterWithFile):
 
 def open_experiment(e_id, experiment_dir=EXPERIMENT_DIR):
     """Open as the appropriate type of Experiment based on the experiment_type field"""
-    try:
-        path_to_file = next(
-            path
-            for path in Path(experiment_dir).iterdir()
-            if path.stem.startswith(f"e{e_id}")
-        )
-    except StopIteration:
-        raise FileNotFoundError(f"no standard experiment with id = e{e_id}")
-    return Experiment.open(e_id)
+    return Experiment.open(e_id, experiment_dir=experiment_dir)
 
 
 class Experiment:
@@ -173,6 +298,12 @@ class Experiment:
         self.tspan_cap = tspan_cap
         self.V_DL = V_DL
         self._cap = None
+        self._meas_key = None  # the key of self.meas in the MeasCache
+        self._meas_hash = None  # see get_meas_hash()
+        self._meas_hash_experiment = None  # self.as_dict(), as json, for _meas_hash
+        self._partial_meas = None  # see get_meas()
+        self._partial_tspans = []  # the tspans covered by _partial_meas
+        self._partial_meas_hash = None  # the meas hash when _partial_meas was made
         self._icpms_points = None
         self.id = e_id or ExperimentCounter().id
         self.default_masses = ["M32", "M34", "M36"]
@@ -200,14 +331,19 @@ class Experiment:
     def save(self):
         self_as_dict = self.as_dict()
         file = EXPERIMENT_DIR / f"{self}.json"
-        with open(file, "w") as f:
-            json.dump(self_as_dict, f, indent=4)
+        with get_relation_index(EXPERIMENT_DIR, "e", "m_id").saving(self.id, self.m_id):
+            save_json(self_as_dict, file, indent=4)
 
     @classmethod
     def load(cls, file):
         """Load a standard experiment given the path to its json file."""
         with open(file, "r") as f:
             self_as_dict = json.load(f)
+        return cls.from_dict(self_as_dict)
+
+    @classmethod
+    def from_dict(cls, self_as_dict):
+        """Initiate the experiment, as the appropriate class, from its file contents"""
         if "plot_specs" in self_as_dict and "ylims" in self_as_dict["plot_specs"]:
             # json turns integer keys to strings. This fixes.
             self_as_dict["plot_specs"]["ylims"] = {
@@ -224,31 +360,213 @@ class Experiment:
     @classmethod
     def open(cls, e_id, experiment_dir=EXPERIMENT_DIR):
         try:
-            path_to_file = next(
-                path
-                for path in Path(experiment_dir).iterdir()
-                if path.stem.startswith(f"e{e_id}")
-            )
-        except StopIteration:
+            path_to_file = get_table_index(experiment_dir).get_path("e", e_id)
+        except FileNotFoundError:
             raise FileNotFoundError(f"no standard experiment with id = e{e_id}")
         return cls.load(path_to_file)
 
     @property
     def meas(self):
-        """The ixdat measurement with the experimental data"""
+        """The ixdat measurement with the experimental data
+
+        The calibrated meas is shared via the MeasCache with other experiments with
+        the same measurement and metadata, so changing it in place (e.g. with
+        meas.reset()) changes it for them too. correct_current() replaces it with a
+        newly calibrated meas before correcting it.
+        The calibrated meas is also saved in CALIBRATED_MEAS_DIR, so that it only needs
+        to be calibrated again if its inputs change. See get_meas_hash()
+        """
         if not self._meas:
-            meas = self.measurement.meas
-            meas.calibrate(
-                RE_vs_RHE=self.measurement.RE_vs_RHE,
-                A_el=0.196,
-            )
-            if self.measurement.R_Ohm:
-                meas.correct_ohmic_drop(self.measurement.R_Ohm)
-            if self.tspan_bg:
-                meas.set_bg(self.tspan_bg)
+            meas_hash = self.get_meas_hash()
+            key = ("calibrated", meas_hash)
+            meas = MeasCache().get(key)
+            if not meas:
+                meas = self.load_calibrated_meas(meas_hash)
+            if not meas:
+                meas = self.calibrate_meas()
+                self.save_calibrated_meas(meas, meas_hash)
+            MeasCache().put(key, meas)
+            self.measurement.meas = meas  # as it is the same data
             self._meas = meas
+            self._meas_key = key
         return self._meas
 
+    def get_meas(self, tspan=None):
+        """Return the calibrated meas, or, if cheaper, only its data in tspan
+
+        If self.meas isn't loaded yet and the measurement's data is in an mmap data
+        file (see Measurement.export_data), only the data in tspan (and tspan_bg, for
+        the background) is read and calibrated. Otherwise this returns self.meas. This
+        is for getting results over short timespans of long measurements, e.g. the
+        rates of a TOF. The partial meas is kept, and only read and calibrated again
+        (for all the timespans asked for so far) if tspan is outside of them, or if
+        the inputs of calibrate_meas() have changed.
+
+        Args:
+            tspan (timespan or list of timespan): The timespan(s) which will be used
+        """
+        if tspan is None or self._meas or not self.measurement.has_mmap_data:
+            return self.meas
+        meas_hash = self.get_meas_hash()
+        if ("calibrated", meas_hash) in MeasCache():
+            return self.meas  # it's already in memory
+        if self._partial_meas_hash != meas_hash:
+            self._partial_meas = None
+            self._partial_tspans = []
+        tspans = [tspan] if np.ndim(tspan[0]) == 0 else list(tspan)
+        new_tspans = [
+            t
+            for t in tspans
+            if not any(c[0] <= t[0] and t[-1] <= c[-1] for c in self._partial_tspans)
+        ]
+        if self._partial_meas is None or new_tspans:
+            self._partial_tspans = self._partial_tspans + new_tspans
+            self._partial_meas = self.calibrate_meas(tspan=self._partial_tspans)
+            self._partial_meas_hash = meas_hash
+        return self._partial_meas
+
+    def calibrate_meas(self, tspan=None):
+        """Return the measurement's data, calibrated and with background set
+
+        Args:
+            tspan (timespan or list of timespan): Optional. Only calibrate the data in
+                tspan (and in tspan_bg), if the data can be partially loaded.
+        """
+        if tspan is not None:
+            tspans = [tspan] if np.ndim(tspan[0]) == 0 else list(tspan)
+            tspan = tspans + [self.tspan_bg] if self.tspan_bg else tspans
+        # calibrating is done in place, so don't use the shared raw meas:
+        meas = self.measurement.load_data(use_cache=False, tspan=tspan)
+        meas.calibrate(
+            RE_vs_RHE=self.measurement.RE_vs_RHE,
+            A_el=0.196,
+        )
+        if self.measurement.R_Ohm:
+            meas.correct_ohmic_drop(self.measurement.R_Ohm)
+        if self.tspan_bg:
+            meas.set_bg(self.tspan_bg)
+        return meas
+
+    def get_meas_hash(self):
+        """Return a hash of all the inputs of calibrate_meas()
+
+        These are the raw data file (path, mtime, and size), the elog fields with the
+        reference electrode potential and ohmic resistance, and the experiment's
+        metadata (as in its json file). The hash is kept until the metadata changes.
+        """
+        experiment = self.as_dict()
+        experiment_json = json.dumps(experiment, sort_keys=True)
+        if self._meas_hash and experiment_json == self._meas_hash_experiment:
+            return self._meas_hash
+        measurement = self.measurement
+        field_data = measurement.elog_field_data or {}
+        data_path = measurement.data_path
+        try:
+            data_stat = os.stat(data_path)
+            data_stamp = [data_stat.st_mtime_ns, data_stat.st_size]
+        except (OSError, TypeError, ValueError):
+            data_stamp = None
+        inputs = dict(
+            data_path=str(data_path),
+            data_stamp=data_stamp,
+            RE_vs_RHE=field_data.get("RE_vs_RHE"),
+            Resistor=field_data.get("Resistor"),
+            experiment=experiment,
+        )
+        self._meas_hash = get_inputs_hash(inputs)
+        self._meas_hash_experiment = experiment_json
+        return self._meas_hash
+
+    def load_calibrated_meas(self, meas_hash):
+        """Return the saved calibrated meas with the given hash, or None"""
+        path_to_file = CALIBRATED_MEAS_DIR / f"e{self.id}_{meas_hash}.pkl"
+        if not path_to_file.exists():
+            return None
+        try:
+            with open(path_to_file, "rb") as f:
+                return pickle.load(f)
+        except Exception as e:  # noqa
+            print(f"WARNING!!! could not load '{path_to_file}' due to error = {e}")
+            return None
+
+    def save_calibrated_meas(self, meas, meas_hash):
+        """Save the calibrated meas, replacing any older version for this experiment"""
+        path_to_file = CALIBRATED_MEAS_DIR / f"e{self.id}_{meas_hash}.pkl"
+        try:
+            CALIBRATED_MEAS_DIR.mkdir(parents=True, exist_ok=True)
+            for old_file in CALIBRATED_MEAS_DIR.glob(f"e{self.id}_*.pkl"):
+                old_file.unlink()
+            write_atomically(
+                path_to_file,
+                lambda f: pickle.dump(meas, f, protocol=pickle.HIGHEST_PROTOCOL),
+                mode="wb",
+            )
+        except Exception as e:  # noqa
+            print(f"WARNING!!! could not save '{path_to_file}' due to error = {e}")
+
+    @property
+    def path_to_results(self):
+        """The file with the saved results (F, alpha, cap) of the experiment
+
+        This is in the (git-ignored) cache, not next to the experiment's file in
+        EXPERIMENT_DIR, as the inputs of the results include the raw data file's
+        mtime (see get_meas_hash()), so they can't be shared between computers.
+        """
+        return EXPERIMENT_RESULTS_DIR / f"e{self.id}.json"
+
+    def load_results(self):
+        """Return the saved {name: {"value", "inputs", "inputs_hash"}} of the results"""
+        path_to_file = self.path_to_results
+        try:
+            with open(path_to_file, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:  # noqa
+            print(f"WARNING!!! could not load '{path_to_file}' due to error = {e}")
+            return {}
+
+    def get_result(self, name, calculate, inputs, force=False):
+        """Return a result calculated from the data, from the saved results if possible
+
+        The result is saved with the inputs it was calculated from (its provenance),
+        and only calculated again if any of the inputs has changed, or if forced.
+
+        Args:
+            name (str): The name of the result, e.g. "cap"
+            calculate (callable): Function calculating the result (a float)
+            inputs (dict): Everything the result depends on. See get_result_inputs()
+            force (bool): Whether to calculate the result even if it's saved
+        """
+        inputs_hash = get_inputs_hash(inputs)
+        results = self.load_results()
+        if not force and name in results:
+            if results[name].get("inputs_hash") == inputs_hash:
+                return results[name]["value"]
+        value = calculate()
+        value = None if value is None else float(value)
+        results[name] = dict(value=value, inputs=inputs, inputs_hash=inputs_hash)
+        path_to_file = self.path_to_results
+        try:
+            EXPERIMENT_RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+            dump_json_atomically(results, path_to_file, indent=4, default=str)
+        except Exception as e:  # noqa
+            print(f"WARNING!!! could not save '{path_to_file}' due to error = {e}")
+        return value
+
+    def get_result_inputs(self):
+        """Return the inputs of the results calculated from the data
+
+        These are the inputs of the calibrated meas (see get_meas_hash(), which
+        includes all the experiment's tspans), and what else the calculations use.
+        """
+        return dict(
+            meas_hash=self.get_meas_hash(),
+            mass_list=self.mass_list,
+            V_DL=self.V_DL,
+            A_el=self.measurement.A_el,
+        )
+
     @property
     def beta(self):
         """Float: The m/z=34 to m/z=32 signal ratio from oxidation of the electrolyte"""
@@ -274,9 +592,7 @@ class Experiment:
         return self._tofs
 
     def load_tofs(self):
-        from .tof import all_tofs
-
-        self._tofs = [tof for tof in all_tofs() if tof.e_id == self.id]
+        self._tofs = self.get_tofs()
 
     @property
     def mol_list(self):
@@ -297,25 +613,37 @@ class Experiment:
     def tof_sets(self):
         from .tof import all_tof_sets
 
-        return [t_set for t_set in all_tof_sets() if t_set.experiment.id == self.id]
+        return [t_set for t_set in all_tof_sets() if t_set.e_id == self.id]
 
     def calc_alpha(self, tspan=None):
         """Return fraction ^{16}O in the electrolyte based on tspan with steady OER"""
         tspan = tspan or self.tspan_alpha
-        x_32, y_32 = self.meas.get_signal(mass="M32", tspan=tspan)
-        x_34, y_34 = self.meas.get_signal(mass="M34", tspan=tspan)
+        meas = self.get_meas(tspan)
+        x_32, y_32 = meas.get_signal(mass="M32", tspan=tspan)
+        x_34, y_34 = meas.get_signal(mass="M34", tspan=tspan)
         gamma = np.mean(y_34) / np.mean(y_32)
         alpha = 2 / (2 + gamma)
         return alpha
 
+    def calc_cap(self):
+        """Return the capacitance in Farads, calculated from the data in tspan_cap"""
+        meas = self.get_meas(self.tspan_cap)
+        cap_cv = meas.cut(self.tspan_cap).as_cv()
+        return cap_cv.get_capacitance(V_DL=self.V_DL) * meas.A_el
+        # Farad/cm^2 * cm^2
+
+    def get_cap(self, force=False):
+        """Return the capacitance in Farads, saved with its inputs. See get_result()"""
+        if self._cap is None or force:
+            self._cap = self.get_result(
+                "cap", self.calc_cap, self.get_result_inputs(), force=force
+            )
+        return self._cap
+
     @property
     def cap(self):
         """Capacitance in Farads"""
-        if not self._cap:
-            cap_cv = self.meas.cut(self.tspan_cap).as_cv()
-            self._cap = cap_cv.get_capacitance(V_DL=self.V_DL) * self.meas.A_el
-            # Farad/cm^2 * cm^2
-        return self._cap
+        return self.get_cap()
 
     @property
     def ECSA(self):
@@ -329,6 +657,8 @@ class Experiment:
 
     def populate_mdict(self):
         """Fill in self.mdict with the EC-MS.Molecules O2_M32, O2_M34, and O2_M36"""
+        from ixdat.techniques.ec_ms import MSCalResult
+
         for mass in ["M32", "M34", "M36"]:
             m = MSCalResult(mol="O2", mass=mass, F=self.F)
             self._mdict[f"O2_{mass}"] = m
@@ -339,56 +669,83 @@ class Experiment:
             self.populate_mdict()
         return self._mdict
 
-    @property
-    def F(self):
-        if not self._F:
+    def calc_F(self):
+        """Return the O2 sensitivity in [C/mol] calculated from the data in tspan_F"""
+        F = 0
+        meas = self.get_meas(self.tspan_F)
+        for mass in self.mass_list:
+            try:
+                x, y = meas.grab(mass, tspan=self.tspan_F)
+                I = calc_current(self, tspan=self.tspan_F)
+                F_M = np.mean(y) / (I / (4 * FARADAY_CONSTANT))
+                F += F_M
+            except KeyError:
+                continue
+        return F
+
+    def get_F(self, force=False):
+        """Return the O2 sensitivity in [C/mol]
+
+        If tspan_F is given, it's calculated from the data and saved with its inputs
+        (see get_result()). Otherwise it's the given F or from the CalibrationSeries.
+        """
+        if self._F is None or force:
             if self.tspan_F:
-                F = 0
-                for mass in self.mass_list:
-                    try:
-                        x, y = self.meas.grab(mass, tspan=self.tspan_F)
-                        I = calc_current(self, tspan=self.tspan_F)
-                        F_M = np.mean(y) / (I / (4 * FARADAY_CONSTANT))
-                        F += F_M
-                    except KeyError:
-                        continue
+                F = self.get_result(
+                    "F", self.calc_F, self.get_result_inputs(), force=force
+                )
             elif self.F_0:
                 F = self.F_0
             else:
-                F = calibration_series.F_of_tstamp(self.meas.tstamp)
+                F = get_calibration_series().F_of_tstamp(self.measurement.tstamp)
             self._F = F
         return self._F
 
     @property
-    def alpha(self):
-        if not self._alpha:
+    def F(self):
+        return self.get_F()
+
+    def get_alpha(self, force=False):
+        """Return the ^{16}O portion in the electrolyte
+
+        If tspan_alpha is given, it's calculated from the data and saved with its
+        inputs (see get_result()). Otherwise it's the given alpha or STANDARD_ALPHA.
+        """
+        if self._alpha is None or force:
             if self.tspan_alpha:
-                alpha = self.calc_alpha()
+                alpha = self.get_result(
+                    "alpha", self.calc_alpha, self.get_result_inputs(), force=force
+                )
             else:
                 alpha = self.alpha_0
             self._alpha = alpha or STANDARD_ALPHA
         return self._alpha
 
+    @property
+    def alpha(self):
+        return self.get_alpha()
+
     def calc_flux(self, mol, tspan, removebackground=True, **kwargs):
         """Return the flux for a calibrated mol (a key to self.mdict)"""
         m = self.mdict[mol]
-        return self.meas.grab_flux(
+        return self.get_meas(tspan).grab_flux(
             m, tspan=tspan, removebackground=removebackground, **kwargs
         )
 
     def get_tofs(self):
         """Return a list of TOFS from the experiment"""
-        from .tof import all_tofs
+        from .constants import TOF_DIR
+        from .tof import TurnOverFrequency
 
         tofs = []  # icpms points
-        for tof in all_tofs():
-            if tof.e_id == self.id:
-                tofs += [tof]
+        for t_id in get_relation_index(TOF_DIR, "t", "e_id").get_ids(self.id):
+            # experiment=self so that the TOF doesn't open it again:
+            tofs += [TurnOverFrequency.open(t_id, experiment=self)]
 
         return tofs
 
     def calc_background_current(self):
-        cap_cv = self.meas.cut(self.tspan_cap).as_cv()
+        cap_cv = self.get_meas(self.tspan_cap).cut(self.tspan_cap).as_cv()
         sweep_1 = cap_cv.select_sweep(vspan=self.V_DL)
         sweep_2 = cap_cv.select_sweep(vspan=[self.V_DL[-1], self.V_DL[0]])
         I_1 = np.mean(sweep_1.grab("raw_current")[1]) * 1e-3  # [mA] -> [A]
@@ -398,6 +755,10 @@ class Experiment:
 
     def correct_current(self):
         I_bg = self.calc_background_current()
+        # self.meas may be shared with other experiments and self.measurement (see
+        # meas), so the correction is made on a newly calibrated meas of its own:
+        self._meas = self.calibrate_meas()
+        self._meas_key = None
         I_str = self.meas.I_str
         J_str = self.meas.J_str
         A_el = self.meas.A_el
@@ -451,6 +812,7 @@ class StandardExperiment(Experiment):
             )
         self.plot_specs = plot_specs
         self._icpms_points = None
+        self._dissolution_rates = None  # see get_dissolution_rates()
 
     def as_dict(self):
         self_as_dict = super().as_dict()
@@ -466,35 +828,41 @@ class StandardExperiment(Experiment):
 
     def get_dissolution_points(self):
         """Return the ICPMS sampling times (t_vec) and molar amounts (n_vec)"""
+        from .icpms import calc_amounts
+
         icpms_points = self.icpms_points
         t_vec = np.array([icpms_point.sampling_time for icpms_point in icpms_points])
-        n_vec = np.array([icpms_point.amount for icpms_point in icpms_points])
+        n_vec, below_dl = calc_amounts(icpms_points)
         return t_vec, n_vec
 
-    def get_dissolution_rates(self):
-        """Return the ICPMS sampling times (t_vec) and dissolution raties (n_dot_vec)"""
-        t_points, n_points = self.get_dissolution_points()
-        t_last = 0
-        t_vec = np.array([])
-        n_dot_vec = np.array([])
-        for (
-            t,
-            n,
-        ) in zip(t_points, n_points):
-            if t == 0:
-                continue
-            if t == t_last:
-                input(f"Waring! {self.measurement} has two ICPMS samples at t={t}.")
-                continue
-            t_vec = np.append(t_vec, t)
-            n_dot = n / (t - t_last)
-            n_dot_vec = np.append(n_dot_vec, n_dot)
-            t_last = t
+    def get_dissolution_rates(self, warn=False):
+        """Return the ICPMS sampling times (t_vec) and dissolution raties (n_dot_vec)
+
+        Of ICPMS samples taken at the same time, only the first counts. The rates are
+        calculated once per experiment. For all the standard experiments, use
+        get_all_dissolution_rates() instead.
+
+        Args:
+            warn (bool): Whether to print a warning for each ICPMS sample which doesn't
+                count. False by default, as this is called for each dissolution TOF.
+        """
+        if self._dissolution_rates is None:
+            t_points, n_points = self.get_dissolution_points()
+            m_ids = np.full(len(t_points), self.m_id)
+            counted, n_dot_vec, duplicate_of = calc_dissolution_rates(
+                m_ids, t_points, n_points
+            )
+            t_duplicates = t_points[duplicate_of >= 0]
+            self._dissolution_rates = (t_points[counted], n_dot_vec, t_duplicates)
+        t_vec, n_dot_vec, t_duplicates = self._dissolution_rates
+        if warn:
+            for t in t_duplicates:
+                print(f"WARNING!!! {self.measurement} has two ICPMS samples at t={t}.")
         return t_vec, n_dot_vec
 
     def get_dissolution_differential(self, tspan=None):
         """Return t, n_dot for plotting the dissolution rate over tspan"""
-        t_vec, n_dot_vec = self.get_dissolution_rates()
+        t_vec, n_dot_vec = self.get_dissolution_rates(warn=True)
         t_diff = np.array([tspan[0] if tspan else 0])
         n_dot_diff = np.array([])
         # t_diff is one longer than n_dot_diff
@@ -535,6 +903,8 @@ class StandardExperiment(Experiment):
             3: The majority-isotope signal (^{16}O2 flux)
             4: The ICPMS-determined dissolution rate
         """
+        from matplotlib import pyplot as plt
+        from matplotlib import gridspec
 
         tspan = tspan or self.tspan_plot
         beta = self.beta
@@ -704,6 +1074,8 @@ class ActExperiment(Experiment):
         alpha=0.5,
         cutoff=1.33,
     ):
+        from matplotlib import pyplot as plt
+
         if not axes:
             fig, ax1 = plt.subplots()
             ax2 = ax1.twinx()
@@ -7,11 +7,14 @@ Created on Wed Sep 16 12:56:04 2020
 
 from pathlib import Path
 import json
+import os
 import numpy as np
-from matplotlib import pyplot as plt
 from .constants import ICPMS_DIR, ICPMS_ID_FILE, ICPMS_CALIBRATION_ID_FILE
 from .tools import singleton_decorator, CounterWithFile
-from EC_MS import Chem
+from .table_index import get_table_index
+from .table_cache import get_table_cache
+from .relation_index import get_relation_index
+from .batch_save import save_json
 
 
 Measurement = None  # .measurement.Measurement imported first call avoid circular import
@@ -31,17 +34,40 @@ class ICPMSCalCounter(CounterWithFile):
     _file = ICPMS_CALIBRATION_ID_FILE
 
 
+def calc_amounts(icpms_points):
+    """Return the amounts in [mol] of the ICPMS points, and which are below the DL
+
+    The signals are converted with one call to ICPMSCalibration.signals_to_amounts()
+    for each calibration, instead of one call for each point.
+
+    Args:
+        icpms_points (list of ICPMSPoint): The ICPMS points, each with a calibration
+
+    Returns np.array, np.array of bool: The amount of the element in the initial
+        volume of each ICPMS point / [mol], and whether it is below the detection
+        limit
+    """
+    amounts = np.zeros(len(icpms_points))
+    below_dl = np.zeros(len(icpms_points), dtype=bool)
+    indeces_by_ic_id = {}
+    for i, icpms_point in enumerate(icpms_points):
+        indeces_by_ic_id.setdefault(icpms_point.ic_id, []).append(i)
+    for ic_id, indeces in indeces_by_ic_id.items():
+        calibration = icpms_points[indeces[0]].calibration
+        amounts[indeces], below_dl[indeces] = calibration.signals_to_amounts(
+            signals=[icpms_points[i].signal for i in indeces],
+            dilutions=[icpms_points[i].dilution for i in indeces],
+            initial_volumes=[icpms_points[i].initial_volume for i in indeces],
+        )
+    return amounts, below_dl
+
+
 def all_icpms_points(icpms_dir=ICPMS_DIR):
     """returns an iterator that yields measurements in order of their id"""
     N_measurements = ICPMSCounter().last()
-    for n in range(1, N_measurements):
-        try:
-            icpms_point = ICPMSPoint.open(n, icpms_dir=icpms_dir)
-        except FileNotFoundError as e:
-            # print(f"skipping {n} due to error = \n{e}")
-            continue
-        else:
-            yield icpms_point
+    table_cache = get_table_cache(icpms_dir)
+    for i_id, path_to_file, self_as_dict in table_cache.rows("i", N_measurements - 1):
+        yield ICPMSPoint.from_dict(self_as_dict)
 
 
 class ICPMSPoint:
@@ -87,8 +113,6 @@ class ICPMSPoint:
         self.initial_volume = initial_volume
         self.sampling_time = sampling_time
         self.description = description
-        if ic_id is not None and ic_id > 0:  # I use -1 sometimes.
-            self.calibration = ICPMSCalibration.open(ic_id)
         self._measurement = None  # opened when needed
         self.icpms_dir = ICPMS_DIR
 
@@ -115,8 +139,9 @@ class ICPMSPoint:
             file_name = f"{self}.json"
         # print(f"saving measurement '{file_name}'")
         path_to_measurement = Path(self.icpms_dir) / file_name
-        with open(path_to_measurement, "w") as f:
-            json.dump(self_as_dict, f, indent=4)
+        relation_index = get_relation_index(self.icpms_dir, "i", "m_id")
+        with relation_index.saving(self.id, self.m_id):
+            save_json(self_as_dict, path_to_measurement, indent=4)
 
     @classmethod
     def load(cls, file_name, icpms_dir=ICPMS_DIR):
@@ -124,6 +149,11 @@ class ICPMSPoint:
         path_to_file = Path(icpms_dir) / file_name
         with open(path_to_file, "r") as f:
             self_as_dict = json.load(f)
+        return cls.from_dict(self_as_dict)
+
+    @classmethod
+    def from_dict(cls, self_as_dict):
+        """Initiate the ICPMS point from the contents of its file"""
         if "id" in self_as_dict:
             self_as_dict["i_id"] = self_as_dict.pop("id")
         return cls(**self_as_dict)
@@ -132,12 +162,8 @@ class ICPMSPoint:
     def open(cls, i_id, icpms_dir=ICPMS_DIR):
         """Opens the measurement given its id"""
         try:
-            path_to_file = next(
-                path
-                for path in Path(icpms_dir).iterdir()
-                if path.stem.startswith(f"i{i_id}")
-            )
-        except StopIteration:
+            path_to_file = get_table_index(icpms_dir).get_path("i", i_id)
+        except FileNotFoundError:
             raise FileNotFoundError(f"no icpms sample with id = {i_id}")
         return cls.load(path_to_file)
 
@@ -151,6 +177,13 @@ class ICPMSPoint:
         s = s.replace("->", "to")  # can't save otherwise
         return s
 
+    @property
+    def calibration(self):
+        """The ICPMSCalibration of the point, shared by all points with its ic_id"""
+        if self.ic_id is None or self.ic_id <= 0:  # I use -1 sometimes.
+            raise AttributeError(f"i{self.id} has no ICPMS calibration")
+        return get_icpms_calibration(self.ic_id, icpms_dir=self.icpms_dir)
+
     @property
     def measurement(self):
         if not self._measurement and self.m_id:
@@ -216,6 +249,10 @@ class ICPMSCalibration:
         self.wash_signals = wash_signals
         self.icpms_dir = ICPMS_DIR
         self._calibration_curve = None
+        self._curve_coefficients = None
+        self._bg = None
+        self._dl_concentration = None
+        self._molar_mass = None
 
     def as_dict(self):
         """Dictionary representation of the ICPMS calibration"""
@@ -239,8 +276,7 @@ class ICPMSCalibration:
             )
         # print(f"saving measurement '{file_name}'")
         path_to_measurement = Path(self.icpms_dir) / file_name
-        with open(path_to_measurement, "w") as f:
-            json.dump(self_as_dict, f, indent=4)
+        save_json(self_as_dict, path_to_measurement, indent=4)
 
     @classmethod
     def load(cls, file_name, icpms_dir=ICPMS_DIR):
@@ -271,24 +307,31 @@ class ICPMSCalibration:
             return ppb
 
         self._calibration_curve = calibration_curve
+        self._curve_coefficients = p
+        self._dl_concentration = None  # it's on the calibration curve
 
     @classmethod
     def open(cls, ic_id, icpms_dir=ICPMS_DIR):
         """Opens the measurement given its id"""
         try:
-            path_to_file = next(
-                path
-                for path in Path(icpms_dir).iterdir()
-                if path.stem.startswith(f"ic{ic_id}")
-            )
-        except StopIteration:
+            path_to_file = get_table_index(icpms_dir).get_path("ic", ic_id)
+        except FileNotFoundError:
             raise FileNotFoundError(f"no icpms calibration with id = {ic_id}")
         return cls.load(path_to_file)
 
     @property
     def bg(self):
         """Background signal / [counts]"""
-        return np.mean(self.wash_signals)
+        if self._bg is None:
+            self._bg = np.mean(self.wash_signals)
+        return self._bg
+
+    @property
+    def curve_coefficients(self):
+        """The slope and intercept of the calibration curve of ln(ppb) vs ln(counts)"""
+        if self._curve_coefficients is None:
+            self.make_calibration_curve()
+        return self._curve_coefficients
 
     @property
     def calibration_curve(self):
@@ -304,24 +347,68 @@ class ICPMSCalibration:
 
     @property
     def dl_concentration(self):
-        """Detection limit concentration / [mol/m^3]"""
-        return self.calibration_curve(self.dl_signal)
+        """Detection limit concentration / [ppb]. Calculated once per curve."""
+        if self._dl_concentration is None:
+            self._dl_concentration = self.calibration_curve(self.dl_signal)
+        return self._dl_concentration
+
+    @property
+    def molar_mass(self):
+        """Molar mass of the element / [g/mol]"""
+        if self._molar_mass is None:
+            from EC_MS import Chem
+
+            self._molar_mass = Chem.get_mass(self.element)
+        return self._molar_mass
+
+    def signals_to_concentrations(self, signals):
+        """Return concentrations in [mol/m^3] of ICPMS samples given their signals
+
+        Args:
+            signals (np.array or list of float): The ICPMS signals in [counts]
+
+        Returns np.array, np.array of bool: The concentrations in the ICPMS samples
+            / [mol/m^3], and whether each is below the detection limit
+        """
+        ppb_concentrations = self.calibration_curve(
+            np.asarray(signals, dtype=float) - self.bg
+        )
+        below_dl = ppb_concentrations < self.dl_concentration
+        kg_per_m3 = ppb_concentrations * 1e-6
+        kg_per_mol = self.molar_mass * 1e-3
+        concentrations = kg_per_m3 / kg_per_mol
+        return concentrations, below_dl
+
+    def signals_to_amounts(self, signals, dilutions, initial_volumes):
+        """Return amounts in [mol] of the element in ICPMS points' initial volumes
+
+        Args:
+            signals (np.array or list of float): The ICPMS signals in [counts]
+            dilutions (np.array or list of float): The dilutions of the ICPMS samples
+            initial_volumes (np.array or list of float): The initial volumes in [m^3]
+
+        Returns np.array, np.array of bool: The amounts / [mol], and whether each is
+            below the detection limit
+        """
+        concentrations, below_dl = self.signals_to_concentrations(signals)
+        amounts = (
+            concentrations
+            * np.asarray(dilutions, dtype=float)
+            * np.asarray(initial_volumes, dtype=float)
+        )
+        return amounts, below_dl
 
     def signal_to_concentration(self, signal):
         """Return concentration in [mol/m^3] of ICPMS sample given its signal"""
-        ppb_concentration = self.calibration_curve(signal - self.bg)
-
-        if ppb_concentration < self.dl_concentration:
+        concentrations, below_dl = self.signals_to_concentrations([signal])
+        if below_dl[0]:
+            ppb_concentration = self.calibration_curve(signal - self.bg)
             print(
                 f"WARNING! ICPMS implied {self.element} concentration in ICPMS sample "
                 + f"is {ppb_concentration} ppb, which is below "
                 + f"the detection limit of {self.dl_concentration} ppb"
             )
-        kg_per_m3 = ppb_concentration * 1e-6
-        kg_per_mol = Chem.get_mass(self.element) * 1e-3
-        concentration = kg_per_m3 / kg_per_mol
-
-        return concentration
+        return concentrations[0]
 
     def plot_calibration(self, ax=None):
         """Plot the ICPMS calibration (as fig A.4 of Scott's PhD thesis)
@@ -329,6 +416,8 @@ class ICPMSCalibration:
         Args:
             ax (plt.Axis):
         """
+        from matplotlib import pyplot as plt
+
         ppbs = self.ppbs
         signals = self.signals
         calibration_curve = self.calibration_curve
@@ -358,3 +447,27 @@ class ICPMSCalibration:
 
         else:
             ax.plot(x_fit, y_fit, "r--")
+
+
+_icpms_calibrations = {}  # {(icpms_dir, ic_id): (file stamp, ICPMSCalibration)}
+
+
+def get_icpms_calibration(ic_id, icpms_dir=ICPMS_DIR):
+    """Return the (shared) ICPMSCalibration with id ic_id, loading it only if needed
+
+    The calibration, with its fitted curve, background, and detection limit, is kept
+    for the whole process and shared by all the ICPMSPoints with this ic_id. It is
+    loaded again only if its file has changed (its path, mtime, or size).
+    """
+    try:
+        path_to_file = get_table_index(icpms_dir).get_path("ic", ic_id)
+        file_stat = os.stat(path_to_file)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"no icpms calibration with id = {ic_id}")
+    stamp = (str(path_to_file), file_stat.st_mtime_ns, file_stat.st_size)
+    key = (os.path.normcase(os.path.abspath(icpms_dir)), int(ic_id))
+    if key in _icpms_calibrations and _icpms_calibrations[key][0] == stamp:
+        return _icpms_calibrations[key][1]
+    calibration = ICPMSCalibration.load(path_to_file)
+    _icpms_calibrations[key] = (stamp, calibration)
+    return calibration
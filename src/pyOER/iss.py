@@ -38,7 +38,8 @@ import matplotlib.pyplot as plt
 from .tools import weighted_smooth as smooth
 #from .tools import smooth
 from .tools import get_range, dict_from_json
-from .settings import DATA_DIR
+from .constants import LEIS_DIR, get_data_dir
+DATA_DIR = get_data_dir()
 
 from collections.abc import Mapping
 
@@ -76,8 +77,7 @@ class ISS:
     def __init__(self, sample=None, fit=None, verbose=False):
         """Main interface for the ISS data """
         self.verbose = verbose
-        self.json_path = (pathlib.Path(__file__).absolute().parent.parent.parent
-                     / 'tables' / 'leis')
+        self.json_path = LEIS_DIR
         self.data_path = DATA_DIR / 'Data' / 'ISS' / 'organized_pickles'
         self.extras_path = DATA_DIR / 'Data' / 'ISS' / 'pickled_pickles'
         self._active = None
@@ -0,0 +1,96 @@
+"""This module implements the in-process cache of loaded ixdat measurements
+
+Loading the raw data of a measurement (Measurement.load_data) means reading a
+multi-MB pickle, and every Measurement or Experiment object used to load its own. The
+MeasCache is a least-recently-used cache shared by all of them. It holds the loaded
+data in memory until its total size exceeds a budget, which can be set with:
+    >>> MeasCache().max_bytes = 4e9  # 4 GB
+
+Keys are tuples which include the modification time of the raw data file, so that
+changed data is not taken from the cache. See Measurement.load_data and
+Experiment.meas for the keys used.
+"""
+from collections import OrderedDict
+import os
+
+from .constants import MEAS_CACHE_MAX_BYTES
+from .tools import singleton_decorator
+
+
+def get_n_bytes(meas):
+    """Return the (approximate) memory used by the data in meas, in [bytes]"""
+    n_bytes = 0
+    for series in getattr(meas, "series_list", []):
+        data = getattr(series, "data", None)
+        n_bytes += getattr(data, "nbytes", 0)
+    return n_bytes
+
+
+def get_mtime(path_to_file):
+    """Return the modification time of path_to_file in [ns], or None if not found"""
+    try:
+        return os.stat(path_to_file).st_mtime_ns
+    except (OSError, TypeError, ValueError):
+        return None
+
+
+@singleton_decorator
+class MeasCache:
+    """A least-recently-used cache of loaded ixdat measurements with a memory budget"""
+
+    def __init__(self, max_bytes=MEAS_CACHE_MAX_BYTES):
+        """Initiate the cache. There is only one, so this is only called once.
+
+        Args:
+            max_bytes (float): The memory budget, in [bytes], for the cached data
+        """
+        self.max_bytes = max_bytes
+        self._cache = OrderedDict()  # {key: (meas, n_bytes)}, most recent last
+        self.n_bytes = 0
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(<{len(self)} measurements, "
+            f"{self.n_bytes / 1e6:.1f} of {self.max_bytes / 1e6:.1f} MB>)"
+        )
+
+    def __len__(self):
+        return len(self._cache)
+
+    def __contains__(self, key):
+        return key in self._cache
+
+    def get(self, key):
+        """Return the measurement cached with key, or None if it is not in the cache"""
+        if key not in self._cache:
+            return None
+        self._cache.move_to_end(key)
+        return self._cache[key][0]
+
+    def put(self, key, meas):
+        """Add meas to the cache with key, evicting the least recently used if needed"""
+        self.pop(key)
+        n_bytes = get_n_bytes(meas)
+        if n_bytes > self.max_bytes:
+            return  # would evict everything else and then itself
+        self._cache[key] = (meas, n_bytes)
+        self.n_bytes += n_bytes
+        self.evict()
+
+    def pop(self, key):
+        """Remove and return the measurement cached with key (None if not cached)"""
+        if key not in self._cache:
+            return None
+        meas, n_bytes = self._cache.pop(key)
+        self.n_bytes -= n_bytes
+        return meas
+
+    def evict(self):
+        """Drop least recently used measurements until the cache is within budget"""
+        while self._cache and self.n_bytes > self.max_bytes:
+            key, (meas, n_bytes) = self._cache.popitem(last=False)
+            self.n_bytes -= n_bytes
+
+    def clear(self):
+        self._cache.clear()
+        self.n_bytes = 0
@@ -6,12 +6,24 @@ import json
 import re
 import time
 import datetime
+import numpy as np
 
 # from EC_MS import Dataset
-from ixdat import Measurement as Meas
-from .constants import MEASUREMENT_DIR, MEASUREMENT_ID_FILE, STANDARD_ELECTRODE_AREA
-from .tools import singleton_decorator, CounterWithFile, FLOAT_MATCH
-from .settings import DATA_DIR
+from .constants import (
+    MEASUREMENT_DIR,
+    MEASUREMENT_ID_FILE,
+    STANDARD_ELECTRODE_AREA,
+    get_data_dir,
+)
+from .tools import singleton_decorator, CounterWithFile
+from .table_index import get_table_index
+from .table_cache import get_table_cache
+from .relation_index import get_relation_index
+from .batch_save import save_json
+from .meas_cache import MeasCache, get_mtime
+from .mmap_data import MMAP_SUFFIX, export_mmap, read_mmap, read_mmap_header
+
+DATA_DIR = get_data_dir()
 
 
 @singleton_decorator
@@ -24,14 +36,9 @@ class MeasurementCounter(CounterWithFile):
 def all_measurements(measurement_dir=MEASUREMENT_DIR):
     """returns an iterator that yields measurements in order of their id"""
     N_measurements = MeasurementCounter().last()
-    for n in range(1, N_measurements + 1):
-        try:
-            measurement = Measurement.open(n, measurement_dir=measurement_dir)
-        except FileNotFoundError as e:
-            continue
-            # print(f"itermeasurement skipping {n} due to error = \n{e}")
-        else:
-            yield measurement
+    table_cache = get_table_cache(measurement_dir)
+    for m_id, path_to_file, self_as_dict in table_cache.rows("m", N_measurements):
+        yield Measurement.from_dict(self_as_dict, path_to_file=path_to_file)
 
 
 class Measurement:
@@ -129,8 +136,9 @@ class Measurement:
             file_name = self.name + ".json"
         print(f"saving measurement '{file_name}'")
         path_to_measurement = Path(self.measurement_dir) / file_name
-        with open(path_to_measurement, "w") as f:
-            json.dump(self_as_dict, f, indent=4)
+        relation_index = get_relation_index(self.measurement_dir, "m", "sample")
+        with relation_index.saving(self.id, self.sample_name):
+            save_json(self_as_dict, path_to_measurement, indent=4)
         if save_dataset:
             self.export_data()
 
@@ -145,6 +153,11 @@ class Measurement:
         path_to_file = Path(measurement_dir) / file_name
         with open(path_to_file, "r") as f:
             self_as_dict = json.load(f)
+        return cls.from_dict(self_as_dict, path_to_file=path_to_file)
+
+    @classmethod
+    def from_dict(cls, self_as_dict, path_to_file=None):
+        """Initiate the measurement from the contents of its file"""
         self_as_dict.update(file_loaded_from=path_to_file)
         if "id" in self_as_dict:
             self_as_dict["m_id"] = self_as_dict.pop("id")
@@ -183,12 +196,8 @@ class Measurement:
     def open(cls, m_id, measurement_dir=MEASUREMENT_DIR):
         """Opens the measurement given its id"""
         try:
-            path_to_file = next(
-                path
-                for path in Path(measurement_dir).iterdir()
-                if path.stem.startswith(f"m{m_id}")
-            )
-        except StopIteration:
+            path_to_file = get_table_index(measurement_dir).get_path("m", m_id)
+        except FileNotFoundError:
             raise FileNotFoundError(f"no measurement with id = m{m_id}")
         return cls.load(path_to_file)
 
@@ -228,6 +237,10 @@ class Measurement:
             self.load_data()
         return self._meas
 
+    @meas.setter
+    def meas(self, meas):
+        self._meas = meas
+
     @property
     def elog(self):
         if not self._elog:
@@ -236,6 +249,8 @@ class Measurement:
 
     @property
     def tstamp(self):
+        if not self._meas and self.has_mmap_data:  # no need to load the data for it
+            return read_mmap_header(self.data_path)["tstamp"]
         return self.meas.tstamp
 
     def __gt__(self, other):
@@ -244,19 +259,77 @@ class Measurement:
     def __ge__(self, other):
         return self.tstamp >= other.tstamp
 
-    def load_data(self):
-        """load the ixdat meas from the EC_MS pkl file"""
-        data_path = self.old_data_path  # Until fix_data_path is available.
-        self._meas = Meas.read(data_path, reader="EC_MS")
-        if not self._meas.series_list:
-            raise IOError(f"Dataset in {self.old_data_path} loaded empty.")
+    @property
+    def mmap_data_path(self):
+        """The memory-mapped data file in the new data directory (None if no dir)"""
+        if self.new_data_path in (None, "None"):
+            return None
+        name = self.name if self.name else self.make_name()
+        return Path(self.new_data_path) / (name + MMAP_SUFFIX)
+
+    @property
+    def data_path(self):
+        """The file the raw data is loaded from. The mmap data file if exported."""
+        mmap_data_path = self.mmap_data_path
+        if mmap_data_path and mmap_data_path.exists():
+            return mmap_data_path
+        return self.old_data_path
+
+    @property
+    def has_mmap_data(self):
+        """Whether the raw data is loaded from a memory-mapped data file"""
+        return Path(self.data_path).suffix == MMAP_SUFFIX
+
+    @property
+    def data_mtime(self):
+        """The modification time of the raw data file in [ns] (None if not found)"""
+        return get_mtime(self.data_path)
+
+    def load_data(self, use_cache=True, tspan=None):
+        """load the ixdat meas from the mmap data file, or else the EC_MS pkl file
+
+        Args:
+            use_cache (bool): Whether to share the meas via the MeasCache. Use False
+                to get a meas of one's own, e.g. to calibrate it in place.
+            tspan (timespan or list of timespan): Optional. If given, and the data has
+                been exported to an mmap data file, only the data in tspan is read, and
+                the (partial) meas is returned without being cached or kept as
+                self.meas. Otherwise, the whole meas is loaded (and returned) anyway.
+        """
+        data_path = self.data_path
+        if tspan is not None and self.has_mmap_data:
+            tspans = [tspan] if np.ndim(tspan[0]) == 0 else tspan
+            return read_mmap(data_path, tspans=tspans)
+        key = ("raw", self.id, str(data_path), get_mtime(data_path))
+        meas = MeasCache().get(key) if use_cache else None
+        if not meas:
+            if self.has_mmap_data:
+                meas = read_mmap(data_path)
+            else:
+                from ixdat import Measurement as Meas
+
+                meas = Meas.read(data_path, reader="EC_MS")
+            if not meas.series_list:
+                raise IOError(f"Dataset in {data_path} loaded empty.")
+            if use_cache:
+                MeasCache().put(key, meas)
+        self._meas = meas
         return self._meas
 
-    def export_data(self):
-        """SAVE the meas in the new data directory"""
+    def export_data(self, csv=True):
+        """SAVE the meas in the new data directory
+
+        The data is saved as a memory-mapped file (see mmap_data.py), which is what
+        load_data() reads from then on, and, if csv is True, also as a .csv file.
+
+        Args:
+            csv (bool): Whether to also export the meas as a .csv file
+        """
         name = self.name if self.name else self.make_name()
-        path_to_pkl = self.new_data_path / (name + ".csv")
-        self.meas.export(file_name=path_to_pkl)
+        if csv:
+            path_to_csv = Path(self.new_data_path) / (name + ".csv")
+            self.meas.export(file_name=path_to_csv)
+        export_mmap(self.meas, self.mmap_data_path)
         self.copied_at = time.time()
 
     def plot(self, *args, **kwargs):
@@ -303,20 +376,44 @@ class Measurement:
             print(f"\n\n######## end of elog notes for '{self}' ###########\n")
 
     @property
-    def RE_vs_RHE(self):
-        try:
-            RE_vs_RHE_str = self.elog.field_data["RE_vs_RHE"]
-            if RE_vs_RHE_str == "":
-                raise KeyError
-        except AttributeError:
-            print(r"WARNING!!! Measurement '{self}' has no elog :(")
-            RE_vs_RHE = None
-        except (KeyError, TypeError):
-            print(f"WARNING!!! No RE_vs_RHE in ({self.elog}), the elog for '{self}'")
-            RE_vs_RHE = None
+    def elog_field_data(self):
+        """The field data of the measurement's elog, or None if it has no elog"""
+        if self._elog:  # e.g. given to __init__. Else, it's got from the elog index.
+            return self._elog.field_data
+        from .elog import get_elog_index
+
+        return get_elog_index().get_field_data(self.elog_number)
+
+    def get_elog_number(self, field, name=None):
+        """Return the number in the field of the measurement's elog, or None
+
+        The numbers in the saved elog entries are parsed once, in the elog index.
+
+        Args:
+            field (str): The name of the field in the elog, e.g. "RE_vs_RHE"
+            name (str): The name of the quantity for the warning. Defaults to field
+        """
+        from .elog import get_elog_index, parse_number
+
+        if self._elog:
+            has_elog = True
+            value = parse_number((self._elog.field_data or {}).get(field))
         else:
-            RE_vs_RHE = float(re.search(FLOAT_MATCH, RE_vs_RHE_str).group())
-        return RE_vs_RHE
+            elog_index = get_elog_index()
+            has_elog = elog_index.has_entry(self.elog_number)
+            value = elog_index.get_number(self.elog_number, field)
+        if not has_elog:
+            print(f"WARNING!!! Measurement '{self}' has no elog :(")
+        elif value is None:
+            print(
+                f"WARNING!!! No {name or field} in (elog {self.elog_number}), "
+                f"the elog for '{self}'"
+            )
+        return value
+
+    @property
+    def RE_vs_RHE(self):
+        return self.get_elog_number("RE_vs_RHE")
 
     @property
     def A_el(self):
@@ -324,28 +421,18 @@ class Measurement:
 
     @property
     def R_Ohm(self):
-        try:
-            R_ohm_str = self.elog.field_data["Resistor"]
-            if R_ohm_str == "":
-                raise KeyError
-        except AttributeError:
-            print(f"WARNING!!! Measurement '{self}' has no elog :(")
-            R_ohm = None
-        except (KeyError, TypeError):
-            print(f"WARNING!!! No R_ohm in ({self.elog}), the elog for '{self}'")
-            R_ohm = None
-        else:
-            R_ohm = float(re.search(FLOAT_MATCH, R_ohm_str).group())
-        return R_ohm
+        return self.get_elog_number("Resistor", name="R_ohm")
 
     def get_icpms_points(self):
         """Return a list of ICPMSPoints from the measurement"""
-        from .icpms import all_icpms_points
+        from .constants import ICPMS_DIR
+        from .icpms import ICPMSPoint
 
         ips = []  # icpms points
         ts = []  # sampling times, for sorting
-        for ip in all_icpms_points():
-            if ip.m_id == self.id and "duplicate" not in ip.description:
+        for i_id in get_relation_index(ICPMS_DIR, "i", "m_id").get_ids(self.id):
+            ip = ICPMSPoint.open(i_id)
+            if "duplicate" not in ip.description:
                 ips += [ip]
                 ts += [ip.sampling_time]
 
@@ -356,10 +443,12 @@ class Measurement:
         return ips
 
     def get_standard_experiment(self):
-        from .experiment import all_standard_experiments
+        from .constants import EXPERIMENT_DIR
+        from .experiment import StandardExperiment
 
-        for se in all_standard_experiments():
-            if se.m_id == self.id:
+        for e_id in get_relation_index(EXPERIMENT_DIR, "e", "m_id").get_ids(self.id):
+            se = StandardExperiment.open(e_id)
+            if not se.experiment_type.startswith("a"):  # as all_standard_experiments
                 return se
         print(f"'{self}' is not a standard experiment.")
         return None
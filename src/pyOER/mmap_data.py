@@ -0,0 +1,204 @@
+"""This module reads and writes the raw data of a measurement as a memory-mapped file
+
+The file starts with a json header describing the data series of the measurement,
+followed by each series' data as one contiguous (64-byte aligned) array. Reading the
+file (read_mmap) maps it into memory rather than loading it, so only the parts of
+the arrays which are actually used (e.g. for the tspan of a TOF) are read from disk.
+With tspans, read_mmap only reads the data in those timespans, finding them by binary
+search in each time series (which the header flags as sorted if they are).
+
+Layout:
+    8 bytes: MMAP_MAGIC
+    8 bytes: length of the header in bytes (unsigned little-endian integer)
+    header: json with "name", "technique", "tstamp", and "series", where "series"
+        is a list of dicts with "name", "unit_name", "kind" ("time" or "value"),
+        "tstamp" and "sorted" (time series) or "tseries" (the index in "series" of a
+        value series' time series),
+        "dtype", "shape", and "offset" (from the start of the file) of the data.
+    the data of each series, starting at its offset.
+"""
+from pathlib import Path
+import json
+
+import numpy as np
+
+from .tools import write_atomically
+
+MMAP_MAGIC = b"PYOERMM1"
+MMAP_SUFFIX = ".mmap"
+ALIGNMENT = 64  # bytes. Each series' data starts at a multiple of this.
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def export_mmap(meas, path_to_file):
+    """Write the data series of meas to path_to_file as a memory-mappable file
+
+    Only TimeSeries and ValueSeries with numerical data are written. Others are
+    skipped with a warning.
+
+    Args:
+        meas (ixdat.Measurement): The measurement with the raw data
+        path_to_file (Path-like): The file to write. MMAP_SUFFIX is recommended.
+    """
+    from ixdat.data_series import TimeSeries, ValueSeries
+
+    time_series = []
+    value_series = []
+    for series in meas.series_list:
+        data = np.ascontiguousarray(series.data)
+        if data.dtype.hasobject:
+            print(f"WARNING!!! not exporting {series} as its data is not numerical.")
+        elif isinstance(series, TimeSeries):
+            time_series.append((series, data))
+        elif isinstance(series, ValueSeries):
+            value_series.append((series, data))
+        else:
+            print(f"WARNING!!! not exporting {series} of type {type(series)}.")
+
+    index_of_tseries = {id(tseries): i for i, (tseries, data) in enumerate(time_series)}
+    series_specs = []
+    for series, data in time_series + value_series:
+        spec = dict(
+            name=series.name,
+            unit_name=series.unit_name,
+            dtype=data.dtype.str,
+            shape=list(data.shape),
+        )
+        if isinstance(series, TimeSeries):
+            is_sorted = bool(np.all(np.diff(data) >= 0))
+            spec.update(kind="time", tstamp=series.tstamp, sorted=is_sorted)
+        else:
+            spec.update(kind="value", tseries=index_of_tseries[id(series.tseries)])
+        series_specs.append(spec)
+
+    # The offsets depend on the header length, which depends on the offsets. So
+    #   reserve enough room for the offsets' digits before writing the header.
+    header = dict(
+        name=meas.name,
+        technique=meas.technique,
+        tstamp=meas.tstamp,
+        series=series_specs,
+    )
+    for spec in series_specs:
+        spec["offset"] = 0
+    header_length = len(json.dumps(header).encode()) + 20 * (len(series_specs) + 1)
+    offset = _aligned(16 + header_length)
+    for spec, (series, data) in zip(series_specs, time_series + value_series):
+        spec["offset"] = offset
+        offset = _aligned(offset + data.nbytes)
+    header_bytes = json.dumps(header).encode().ljust(header_length)
+
+    def write(f):
+        f.write(MMAP_MAGIC)
+        f.write(header_length.to_bytes(8, "little"))
+        f.write(header_bytes)
+        for spec, (series, data) in zip(series_specs, time_series + value_series):
+            f.write(b"\0" * (spec["offset"] - f.tell()))
+            f.write(data.tobytes())
+
+    write_atomically(path_to_file, write, mode="wb")
+
+
+def read_mmap_header(path_to_file):
+    """Return the header (as a dict) of a file written by export_mmap"""
+    with open(path_to_file, "rb") as f:
+        if f.read(len(MMAP_MAGIC)) != MMAP_MAGIC:
+            raise IOError(f"{path_to_file} is not a pyOER memory-mapped data file")
+        header_length = int.from_bytes(f.read(8), "little")
+        return json.loads(f.read(header_length).decode())
+
+
+def get_selection(t, tspans, is_sorted=True):
+    """Return the slices (or, if t is not sorted, the mask) of t in any of tspans
+
+    For sorted t, the boundaries are found by binary search, so only the few pages of
+    a memory-mapped t that the search touches are read from disk. One point on either
+    side of each tspan is included, so that the data can be interpolated at its ends.
+
+    Args:
+        t (np.array): The time data
+        tspans (list of timespan): The timespans, in the same time frame as t
+        is_sorted (bool): Whether t is sorted (in increasing order)
+    """
+    if not is_sorted:
+        mask = np.zeros(t.shape, dtype=bool)
+        for tspan in tspans:
+            mask = mask | ((tspan[0] <= t) & (t <= tspan[-1]))
+        return mask
+    slices = []
+    for tspan in sorted(tspans, key=lambda tspan: tspan[0]):
+        start = max(int(np.searchsorted(t, tspan[0], side="left")) - 1, 0)
+        stop = min(int(np.searchsorted(t, tspan[-1], side="right")) + 1, len(t))
+        if slices and start <= slices[-1].stop:  # overlaps the last one. Merge.
+            slices[-1] = slice(slices[-1].start, max(stop, slices[-1].stop))
+        elif stop > start:
+            slices.append(slice(start, stop))
+    return slices
+
+
+def _select(data, selection):
+    """Return data[selection], with selection as returned by get_selection()"""
+    if isinstance(selection, np.ndarray):
+        return data[selection]
+    return np.concatenate([data[s] for s in selection] or [data[:0]])
+
+
+def read_mmap(path_to_file, tspans=None):
+    """Return an ixdat measurement with data memory-mapped from path_to_file
+
+    The data is mapped copy-on-write, so changing it in memory doesn't change the file
+
+    Args:
+        path_to_file (Path-like): The file, as written by export_mmap()
+        tspans (list of timespan): Optional. If given, only the data in these
+            timespans (relative to the measurement's tstamp) is read. It is then
+            copied into memory, rather than mapped.
+    """
+    from ixdat import Measurement as Meas
+    from ixdat.data_series import TimeSeries, ValueSeries
+
+    path_to_file = Path(path_to_file)
+    header = read_mmap_header(path_to_file)
+    buffer = np.memmap(path_to_file, dtype=np.uint8, mode="c")
+
+    def get_data(spec):
+        dtype = np.dtype(spec["dtype"])
+        n_bytes = int(np.prod(spec["shape"])) * dtype.itemsize
+        data = buffer[spec["offset"] : spec["offset"] + n_bytes]
+        return data.view(dtype).reshape(spec["shape"])
+
+    series_list = []  # the time series come first, as written by export_mmap
+    selections = []  # the selection of the data of each time series in series_list
+    for spec in header["series"]:
+        data = get_data(spec)
+        if spec["kind"] == "time":
+            if tspans is not None:
+                dt = spec["tstamp"] - header["tstamp"]  # series vs meas time frame
+                tspans_here = [[tspan[0] - dt, tspan[-1] - dt] for tspan in tspans]
+                selection = get_selection(data, tspans_here, spec.get("sorted"))
+                selections.append(selection)
+                data = _select(data, selection)
+            series = TimeSeries(
+                spec["name"], spec["unit_name"], data, tstamp=spec["tstamp"]
+            )
+        else:
+            if tspans is not None:
+                data = _select(data, selections[spec["tseries"]])
+            series = ValueSeries(
+                spec["name"],
+                spec["unit_name"],
+                data,
+                tseries=series_list[spec["tseries"]],
+            )
+        series_list.append(series)
+    return Meas.from_dict(
+        dict(
+            name=header["name"],
+            technique=header["technique"],
+            series_list=series_list,
+            tstamp=header["tstamp"],
+        )
+    )
@@ -0,0 +1,344 @@
+"""This module finds the rows of the tables matching filters, before loading them
+
+Instead of initiating every row of a table and filtering the objects, e.g.:
+    >>> [tof for tof in all_tofs() if tof.tof_type == "activity" and tof.id > 239
+    ...     and tof.sample_name.startswith("Reshma")]
+the filters are given as keyword arguments:
+    >>> from pyOER import query
+    >>> query.tofs(tof_type="activity", id_gt=239, sample_prefix="Reshma")
+and evaluated on the stored contents of the files (via the TableCache) or, where
+possible, on the RelationIndex of the field, so that only the matching rows are read
+and initiated as objects. Filters on the id are only read in the id range, and a
+filter on an indexed field (e.g. the e_id of the TOFs, or the sample of the TOFs via
+their experiments' measurements) only reads the rows with a matching value.
+
+Each keyword argument is a field name, optionally followed by "_" and a lookup:
+    field=value           the field is equal to value
+    field_ne=value        the field is not equal to value
+    field_in=values       the field is one of values (a list, tuple, or set)
+    field_gt=value        the field is greater than value (also _ge, _lt, and _le)
+    field_prefix=value    the field is a str starting with value (or a tuple thereof)
+    field_contains=value  value is in the field (a str or a list)
+The field "id" is the id of the row. Missing fields are None.
+
+Like all_tofs() etc., the queries only find rows up to the last id of the table's
+counter. query.rows() and query.ids() return the matching contents and id's without
+initiating any objects.
+"""
+import json
+import math
+
+from .constants import (
+    MEASUREMENT_DIR,
+    EXPERIMENT_DIR,
+    TOF_DIR,
+    ICPMS_DIR,
+    CALIBRATION_DIR,
+)
+from .table_index import get_table_index
+from .table_cache import get_table_cache
+from .relation_index import get_relation_index
+
+LOOKUPS = {
+    "eq": lambda x, value: x == value,
+    "ne": lambda x, value: x != value,
+    "in": lambda x, values: x in values,
+    "gt": lambda x, value: x is not None and x > value,
+    "ge": lambda x, value: x is not None and x >= value,
+    "lt": lambda x, value: x is not None and x < value,
+    "le": lambda x, value: x is not None and x <= value,
+    "prefix": lambda x, value: isinstance(x, str) and x.startswith(value),
+    "contains": lambda x, value: x is not None and value in x,
+}
+
+TABLES = {
+    # table: dict(table_dir, prefix, indexed (fields), aliases {alias: field})
+    "measurements": dict(
+        table_dir=MEASUREMENT_DIR,
+        prefix="m",
+        indexed=["sample", "date"],
+        aliases={"m_id": "id", "sample_name": "sample"},
+    ),
+    "experiments": dict(
+        table_dir=EXPERIMENT_DIR,
+        prefix="e",
+        indexed=["m_id"],
+        aliases={"e_id": "id"},
+    ),
+    "tofs": dict(
+        table_dir=TOF_DIR,
+        prefix="t",
+        indexed=["e_id"],  # and sample_name, m_id, and date via the experiments
+        aliases={"t_id": "id", "sample": "sample_name"},
+    ),
+    "icpms_points": dict(
+        table_dir=ICPMS_DIR,
+        prefix="i",
+        indexed=["m_id"],
+        aliases={"i_id": "id"},
+    ),
+    "calibrations": dict(
+        table_dir=CALIBRATION_DIR,
+        prefix="c",
+        indexed=[],
+        aliases={"c_id": "id"},
+    ),
+}
+
+# the fields that TOFs get from their experiment's measurement, as in all_tofs()
+TOF_MEASUREMENT_FIELDS = {"sample_name": "sample", "date": "date"}
+
+
+def get_last_id(table):
+    """Return the highest id of the table which all_<table>() would yield"""
+    if table == "measurements":
+        from .measurement import MeasurementCounter
+
+        return MeasurementCounter().last()
+    if table == "experiments":
+        from .experiment import ExperimentCounter
+
+        return ExperimentCounter().last() - 1
+    if table == "tofs":
+        from .tof import TOFCounter
+
+        return TOFCounter().last()
+    if table == "icpms_points":
+        from .icpms import ICPMSCounter
+
+        return ICPMSCounter().last() - 1
+    if table == "calibrations":
+        from .calibration import CalibrationCounter
+
+        return CalibrationCounter().last()
+    raise ValueError(f"no table called {table!r}. Tables are {list(TABLES)}")
+
+
+def parse_filters(filters, aliases=None):
+    """Return a list of (field, lookup, value) for the keyword-argument filters"""
+    aliases = aliases or {}
+    conditions = []
+    for key, value in filters.items():
+        field, lookup = key, "eq"
+        head, _, tail = key.rpartition("_")
+        if head and tail in LOOKUPS:
+            field, lookup = head, tail
+        if lookup == "in":
+            value = list(value)
+        elif lookup == "prefix" and isinstance(value, list):
+            value = tuple(value)
+        conditions.append((aliases.get(field, field), lookup, value))
+    return conditions
+
+
+def make_test(lookup, value):
+    """Return a function of a field's value which is True if it passes the filter"""
+    compare = LOOKUPS[lookup]
+
+    def test(x):
+        try:
+            return bool(compare(x, value))
+        except TypeError:  # e.g. comparing None or a str with a number
+            return False
+
+    return test
+
+
+def get_id_range(conditions):
+    """Return (id_min, id_max) implied by the conditions on the id (None if open)"""
+    id_min, id_max = None, None
+    for field, lookup, value in conditions:
+        if field != "id":
+            continue
+        if lookup == "eq":
+            low, high = value, value
+        elif lookup == "in":
+            low, high = (min(value), max(value)) if value else (1, 0)
+        elif lookup == "gt":
+            low, high = math.floor(value) + 1, None
+        elif lookup == "ge":
+            low, high = math.ceil(value), None
+        elif lookup == "lt":
+            low, high = None, math.ceil(value) - 1
+        elif lookup == "le":
+            low, high = None, math.floor(value)
+        else:
+            continue
+        if low is not None:
+            id_min = low if id_min is None else max(id_min, low)
+        if high is not None:
+            id_max = high if id_max is None else min(id_max, high)
+    return id_min, id_max
+
+
+def get_tof_metadata(e_id):
+    """Return the m_id, sample_name, and date of the experiment e_id, via the indexes
+
+    This is the same as get_experiment_metadata()[e_id] in tof.py, but without
+    reading through the experiment and measurement tables on each call.
+    """
+    m_id = get_relation_index(EXPERIMENT_DIR, "e", "m_id").get_value(e_id)
+    metadata = dict(m_id=m_id)
+    for field, measurement_field in TOF_MEASUREMENT_FIELDS.items():
+        metadata[field] = get_relation_index(
+            MEASUREMENT_DIR, "m", measurement_field
+        ).get_value(m_id)
+    return metadata
+
+
+def get_tof_ids_where(field, test):
+    """Return the set of t_ids for which the TOF's field, as in all_tofs(), passes test
+
+    The TOFs get their m_id, sample_name, and date from their experiment if it is not
+    stored in their file. Returns None if this can't narrow down the TOFs.
+    """
+    if field == "e_id":
+        return set(get_relation_index(TOF_DIR, "t", "e_id").get_ids_where(test))
+    if (field not in TOF_MEASUREMENT_FIELDS and field != "m_id") or test(None):
+        return None
+    stored_index = get_relation_index(TOF_DIR, "t", field)
+    t_ids = set(stored_index.get_ids_where(lambda x: x is not None and test(x)))
+    experiment_index = get_relation_index(EXPERIMENT_DIR, "e", "m_id")
+    if field == "m_id":
+        e_ids = experiment_index.get_ids_where(test)
+    else:
+        measurement_index = get_relation_index(
+            MEASUREMENT_DIR, "m", TOF_MEASUREMENT_FIELDS[field]
+        )
+        e_ids = [
+            e_id
+            for m_id in measurement_index.get_ids_where(test)
+            for e_id in experiment_index.get_ids(m_id)
+        ]
+    tof_index = get_relation_index(TOF_DIR, "t", "e_id")
+    for e_id in e_ids:
+        for t_id in tof_index.get_ids(e_id):
+            if stored_index.get_value(t_id) is None:
+                t_ids.add(t_id)
+    return t_ids
+
+
+def get_candidate_ids(table, conditions):
+    """Return the set of id's which may match, from the indexes (None if unknown)"""
+    table_spec = TABLES[table]
+    candidates = None
+    for field, lookup, value in conditions:
+        test = make_test(lookup, value)
+        if table == "tofs":
+            r_ids = get_tof_ids_where(field, test)
+        elif field in table_spec["indexed"]:
+            r_ids = set(
+                get_relation_index(
+                    table_spec["table_dir"], table_spec["prefix"], field
+                ).get_ids_where(test)
+            )
+        else:
+            r_ids = None
+        if r_ids is not None:
+            candidates = r_ids if candidates is None else candidates & r_ids
+    return candidates
+
+
+def rows(table, **filters):
+    """Yield (id, path_to_file, self_as_dict) for the rows of table matching filters
+
+    Args:
+        table (str): One of TABLES, e.g. "tofs"
+        filters: See the module docstring, e.g. tof_type="activity", id_gt=239
+    """
+    table_spec = TABLES[table]
+    table_dir, prefix = table_spec["table_dir"], table_spec["prefix"]
+    conditions = parse_filters(filters, aliases=table_spec["aliases"])
+    tests = [(field, make_test(lookup, value)) for field, lookup, value in conditions]
+    id_min, id_max = get_id_range(conditions)
+    last_id = get_last_id(table)
+    id_max = last_id if id_max is None else min(id_max, last_id)
+
+    candidates = get_candidate_ids(table, conditions)
+    if candidates is None:
+        table_rows = get_table_cache(table_dir).rows(prefix, id_max, id_min)
+    else:
+        table_rows = _read_rows(table_dir, prefix, candidates, id_max, id_min)
+
+    for r_id, path_to_file, self_as_dict in table_rows:
+        if table == "tofs":
+            metadata = get_tof_metadata(self_as_dict.get("e_id"))
+            for key, value in metadata.items():
+                if self_as_dict.get(key) is None:
+                    self_as_dict[key] = value
+        if all(
+            test(r_id if field == "id" else self_as_dict.get(field))
+            for field, test in tests
+        ):
+            yield r_id, path_to_file, self_as_dict
+
+
+def _read_rows(table_dir, prefix, r_ids, id_max=None, id_min=None):
+    """Yield (id, path_to_file, self_as_dict) of the rows with r_ids, in order of id"""
+    table_index = get_table_index(table_dir)
+    for r_id in sorted(r_ids):
+        if (id_max is not None and r_id > id_max) or (
+            id_min is not None and r_id < id_min
+        ):
+            continue
+        try:
+            path_to_file = table_index.get_path(prefix, r_id)
+        except FileNotFoundError:
+            continue  # removed since the index was built
+        with open(path_to_file, "r") as f:
+            yield r_id, path_to_file, json.load(f)
+
+
+def ids(table, **filters):
+    """Return the list of id's of the rows of table matching filters. See rows()"""
+    return [r_id for r_id, path_to_file, self_as_dict in rows(table, **filters)]
+
+
+def measurements(**filters):
+    """Return the Measurements matching filters, e.g. sample_prefix="Reshma" """
+    from .measurement import Measurement
+
+    return [
+        Measurement.from_dict(self_as_dict, path_to_file=path_to_file)
+        for m_id, path_to_file, self_as_dict in rows("measurements", **filters)
+    ]
+
+
+def experiments(**filters):
+    """Return the Experiments (as their type) matching filters, e.g. m_id=12"""
+    from .experiment import Experiment
+
+    return [
+        Experiment.from_dict(self_as_dict)
+        for e_id, path_to_file, self_as_dict in rows("experiments", **filters)
+    ]
+
+
+def tofs(**filters):
+    """Return the TurnOverFrequency's matching filters, e.g. tof_type="activity" """
+    from .tof import TurnOverFrequency
+
+    return [
+        TurnOverFrequency.from_dict(self_as_dict)
+        for t_id, path_to_file, self_as_dict in rows("tofs", **filters)
+    ]
+
+
+def icpms_points(**filters):
+    """Return the ICPMSPoints matching filters, e.g. m_id=12, element="Ir" """
+    from .icpms import ICPMSPoint
+
+    return [
+        ICPMSPoint.from_dict(self_as_dict)
+        for i_id, path_to_file, self_as_dict in rows("icpms_points", **filters)
+    ]
+
+
+def calibrations(**filters):
+    """Return the (MS) Calibrations matching filters, e.g. category="good" """
+    from .calibration import Calibration
+
+    return [
+        Calibration.load(path_to_file)
+        for c_id, path_to_file, self_as_dict in rows("calibrations", **filters)
+    ]
@@ -0,0 +1,158 @@
+"""This module indexes the rows of a table by the value of one of their fields
+
+Relations between the tables are stored as fields which refer to rows of other tables
+(foreign keys), e.g. the "e_id" of a TOF or the "sample" of a measurement. Finding all
+the rows which refer to a given row (e.g. the TOFs of an experiment) would otherwise
+mean reading through the whole table. A RelationIndex keeps a {value: {id}} dictionary
+for one field of the rows with one prefix in a table directory, built from the
+table's TableCache on first use. The indexes used in pyOER are:
+    - measurements by "sample"   (Sample.measurement_ids)
+    - experiments by "m_id"      (Measurement.get_standard_experiment)
+    - TOFs by "e_id"             (Experiment.get_tofs)
+    - ICPMS points by "m_id"     (Measurement.get_icpms_points)
+
+The index is rebuilt when the modification time of the directory changes (i.e. when
+a file is added, removed, or renamed by anything else than a save() which updates the
+index), or with rebuild(). Saving a row through the saving() context manager updates
+the index without a rebuild. Get the (shared) index with get_relation_index().
+"""
+from contextlib import contextmanager
+from pathlib import Path
+import os
+
+from .table_cache import get_table_cache
+from .batch_save import get_active_batch
+
+
+class RelationIndex:
+    """An index of the id's of the rows in a table by the value of one of their fields"""
+
+    def __init__(self, table_dir, prefix, field):
+        """Initiate the index. It is built on first use.
+
+        Args:
+            table_dir (Path-like): The directory containing the table's files
+            prefix (str): The start of the file names of the rows, e.g. "t" or "i"
+            field (str): The field of the rows to index the id's by, e.g. "e_id"
+        """
+        self.table_dir = Path(table_dir)
+        self.prefix = prefix
+        self.field = field
+        self._mtime = None  # the directory mtime at which the index was built
+        self._ids = {}  # {value: set of id's}
+        self._values = {}  # {id: value}
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}({self.table_dir}, "
+            f"prefix={self.prefix!r}, field={self.field!r})"
+        )
+
+    def _get_mtime(self):
+        try:
+            return os.stat(self.table_dir).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    @property
+    def is_built(self):
+        return self._mtime is not None
+
+    def refresh(self, force=False):
+        """Rebuild the index if the directory has changed since it was last built"""
+        mtime = self._get_mtime()
+        if force or self._mtime is None or mtime != self._mtime:
+            self.build()
+            self._mtime = mtime
+
+    def rebuild(self):
+        """Rebuild the index from the table, e.g. after files were edited by hand"""
+        self.refresh(force=True)
+
+    def build(self):
+        """Read the field of each row of the table (via its TableCache) into the index"""
+        self._ids = {}
+        self._values = {}
+        if not self.table_dir.exists():
+            return
+        for r_id, path_to_file, self_as_dict in get_table_cache(self.table_dir).rows(
+            self.prefix
+        ):
+            self._set(r_id, self_as_dict.get(self.field))
+
+    def _set(self, r_id, value):
+        """Set the value of the row with id r_id in the index"""
+        old_value = self._values.get(r_id)
+        if old_value in self._ids:
+            self._ids[old_value].discard(r_id)
+        try:
+            self._ids.setdefault(value, set()).add(r_id)
+        except TypeError:  # unhashable, e.g. a list. Not a foreign key.
+            self._values.pop(r_id, None)
+            return
+        self._values[r_id] = value
+
+    def get_ids(self, value):
+        """Return a sorted list of the id's of the rows with the field equal to value"""
+        self.refresh()
+        try:
+            return sorted(self._ids.get(value, ()))
+        except TypeError:  # unhashable value
+            return []
+
+    def get_ids_where(self, test):
+        """Return a sorted list of the id's of the rows for which test(value) is True
+
+        test is called once for each distinct value of the field, not for each row.
+        """
+        self.refresh()
+        r_ids = set()
+        for value, ids in self._ids.items():
+            if test(value):
+                r_ids.update(ids)
+        return sorted(r_ids)
+
+    def get_value(self, r_id):
+        """Return the value of the field of the row with id r_id (None if not found)"""
+        self.refresh()
+        return self._values.get(r_id)
+
+    def update(self, r_id, value):
+        """Set the value of the row with id r_id, which is saved with that value
+
+        The index is not rebuilt for the change in the directory caused by saving
+        the row. Use saving() to make sure it is up to date before the row is saved.
+        """
+        if not self.is_built:
+            return  # it'll include the row when it's built
+        self._set(r_id, value)
+        self._mtime = self._get_mtime()
+
+    @contextmanager
+    def saving(self, r_id, value):
+        """Context manager for saving a row of the table and updating the index
+
+        Usage, e.g. in TurnOverFrequency.save():
+            >>> with get_relation_index(TOF_DIR, "t", "e_id").saving(self.id, self.e_id):
+            >>>     save_json(self_as_dict, path_to_file, atomic=True, indent=4)
+
+        If the index is built, it is refreshed before and updated after the save. In
+        a batch (see batch_save.py), the row is only written when the batch is done,
+        and the index is then rebuilt, as the directory has changed.
+        """
+        if self.is_built:
+            self.refresh()
+        yield self
+        if get_active_batch() is None:
+            self.update(r_id, value)
+
+
+_relation_indeces = {}  # {(table_dir, prefix, field): RelationIndex}
+
+
+def get_relation_index(table_dir, prefix, field):
+    """Return the (shared) RelationIndex of field in table_dir, making it if needed"""
+    key = (os.path.normcase(os.path.abspath(table_dir)), prefix, field)
+    if key not in _relation_indeces:
+        _relation_indeces[key] = RelationIndex(table_dir, prefix, field)
+    return _relation_indeces[key]
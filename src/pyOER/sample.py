@@ -2,8 +2,14 @@
 
 import json
 
-from .constants import SAMPLE_DIR, STANDARD_SITE_DENSITY, STANDARD_SPECIFIC_CAPACITANCE
-from .measurement import Measurement, all_measurements
+from .constants import (
+    SAMPLE_DIR,
+    MEASUREMENT_DIR,
+    STANDARD_SITE_DENSITY,
+    STANDARD_SPECIFIC_CAPACITANCE,
+)
+from .measurement import Measurement
+from .relation_index import get_relation_index
 
 SAMPLE_TYPES = {
     "Ru": {
@@ -128,11 +134,7 @@ class Sample:
 
     @property
     def measurement_ids(self):
-        m_ids = []
-        for m in all_measurements():
-            if m.sample_name == self.name:
-                m_ids += [m.id]
-        return m_ids
+        return get_relation_index(MEASUREMENT_DIR, "m", "sample").get_ids(self.name)
 
     @property
     def measurements(self):
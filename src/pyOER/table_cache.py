@@ -0,0 +1,166 @@
+"""This module keeps a single-file cache of the contents of each table directory
+
+Reading a whole table (e.g. with all_tofs()) would otherwise mean opening and parsing
+hundreds of small .json files. A TableCache keeps the contents of all the files of a
+table directory in one sqlite file in tables/.cache/, together with each file's mtime
+and size. Before the cache is read, it is synchronized with the directory: only the
+files which were added or changed since they were cached are read again, and rows of
+files which were removed are dropped.
+
+The cache is only for reading. The .json files in tables/ are always the ground truth,
+so the cache folder can be deleted at any time.
+"""
+from pathlib import Path
+import json
+import os
+import sqlite3
+
+from .table_index import ID_MATCHER, get_table_index
+
+CACHE_FOLDER_NAME = ".cache"
+
+
+class TableCache:
+    """A single-file (sqlite) cache of the contents of the files in a table directory"""
+
+    def __init__(self, table_dir, cache_dir=None):
+        """Initiate the cache. The cache file is made (or updated) on first use.
+
+        Args:
+            table_dir (Path-like): The directory containing the table's files
+            cache_dir (Path-like): The directory to put the cache file in. Defaults to
+                a folder called .cache next to table_dir.
+        """
+        self.table_dir = Path(table_dir)
+        cache_dir = cache_dir or self.table_dir.parent / CACHE_FOLDER_NAME
+        self.path_to_cache = Path(cache_dir) / (self.table_dir.name + ".sqlite")
+        self._connection = None
+        self._pid = None  # connections should not be shared with forked processes
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.table_dir})"
+
+    @property
+    def connection(self):
+        """The sqlite3 connection to the cache file"""
+        if not self._connection or self._pid != os.getpid():
+            self.path_to_cache.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(str(self.path_to_cache), timeout=30)
+            self._pid = os.getpid()
+            with self._connection:
+                self._connection.execute(
+                    "CREATE TABLE IF NOT EXISTS rows ("
+                    "file_name TEXT PRIMARY KEY, prefix TEXT, id INTEGER, "
+                    "mtime_ns INTEGER, size INTEGER, contents TEXT)"
+                )
+                self._connection.execute(
+                    "CREATE INDEX IF NOT EXISTS prefix_and_id ON rows (prefix, id)"
+                )
+        return self._connection
+
+    def close(self):
+        if self._connection and self._pid == os.getpid():
+            self._connection.close()
+        self._connection = None
+
+    def sync(self):
+        """Update the cache with the files that were added, changed, or removed
+
+        Returns int: The number of files that were (re-)read
+        """
+        connection = self.connection
+        cached = {
+            file_name: (mtime_ns, size)
+            for file_name, mtime_ns, size in connection.execute(
+                "SELECT file_name, mtime_ns, size FROM rows"
+            )
+        }
+        new_rows = []
+        file_names = set()
+        with os.scandir(self.table_dir) as entries:
+            for entry in entries:
+                id_match = ID_MATCHER.search(entry.name)
+                if not id_match or not entry.is_file():
+                    continue
+                file_names.add(entry.name)
+                stat = entry.stat()
+                if cached.get(entry.name) == (stat.st_mtime_ns, stat.st_size):
+                    continue
+                with open(entry.path, "r") as f:
+                    contents = f.read()
+                try:
+                    json.loads(contents)
+                except ValueError as e:
+                    print(f"WARNING!!! not caching '{entry.path}' due to error = {e}")
+                    continue
+                new_rows.append(
+                    (
+                        entry.name,
+                        id_match.group(1),
+                        int(id_match.group(2)),
+                        stat.st_mtime_ns,
+                        stat.st_size,
+                        contents,
+                    )
+                )
+        removed_file_names = [(name,) for name in cached if name not in file_names]
+        with connection:  # commits everything as one transaction
+            connection.executemany(
+                "INSERT OR REPLACE INTO rows VALUES (?, ?, ?, ?, ?, ?)", new_rows
+            )
+            connection.executemany(
+                "DELETE FROM rows WHERE file_name = ?", removed_file_names
+            )
+        return len(new_rows)
+
+    def rows(self, prefix, id_max=None, id_min=None):
+        """Yield (id, path_to_file, self_as_dict) for rows with prefix in order of id
+
+        The cache is synchronized with the table directory first. If the cache can't be
+        used (e.g. if the cache directory is read-only), the files are read directly.
+
+        Args:
+            prefix (str): The start of the file name before the id, e.g. "t" or "ic"
+            id_max (int): Optional. If given, rows with an id above this are skipped.
+            id_min (int): Optional. If given, rows with an id below this are skipped.
+                Only the rows in between are read from the cache.
+        """
+        id_max = id_max if id_max is not None else float("inf")
+        id_min = id_min if id_min is not None else -float("inf")
+        if id_min > id_max:
+            return
+        try:
+            self.sync()
+            # fetch all now so that the cursor is closed before any (nested) sync():
+            cached_rows = self.connection.execute(
+                "SELECT id, file_name, contents FROM rows WHERE prefix = ? "
+                "AND id >= ? AND id <= ? ORDER BY id",
+                (prefix, max(id_min, -(2**63)), min(id_max, 2**63 - 1)),
+            ).fetchall()
+        except (sqlite3.Error, OSError) as e:
+            print(f"WARNING!!! can't use {self} due to error = {e}. Reading files.")
+            yield from self._rows_from_files(prefix, id_max, id_min)
+            return
+        for r_id, file_name, contents in cached_rows:
+            yield r_id, self.table_dir / file_name, json.loads(contents)
+
+    def _rows_from_files(self, prefix, id_max, id_min):
+        """Yield what rows() would yield, but reading the files in the table directory"""
+        for r_id, path_to_file in get_table_index(self.table_dir).items(prefix):
+            if r_id > id_max:
+                break
+            if r_id < id_min:
+                continue
+            with open(path_to_file, "r") as f:
+                yield r_id, path_to_file, json.load(f)
+
+
+_table_caches = {}  # {table_dir: TableCache}, see get_table_cache()
+
+
+def get_table_cache(table_dir):
+    """Return the (shared) TableCache of table_dir, making it if needed"""
+    key = os.path.normcase(os.path.abspath(table_dir))
+    if key not in _table_caches:
+        _table_caches[key] = TableCache(table_dir)
+    return _table_caches[key]
@@ -0,0 +1,107 @@
+"""This module indexes the table directories so that rows can be opened by id
+
+Each table in tables/ is a directory with one file per row, and the files are named
+starting with a prefix and the row's id, e.g. "t100 is exchange on Easter1B on 19J21"
+or "ECMS 127 None". A TableIndex reads the file names of a table directory once and
+keeps a {prefix: {id: path}} dictionary, which is rebuilt only when the modification
+time of the directory changes (i.e. when a file is added, removed, or renamed).
+
+The indeces are shared by all classes opening rows from the same directory. Get one
+with get_table_index(table_dir).
+"""
+from pathlib import Path
+import os
+import re
+
+# matches the prefix and id at the start of a table file name, e.g. ("ic", "12") in
+#   "ic12 is icpms calibration for Ir on 20A15" or ("ECMS ", "127") in "ECMS 127 None"
+#   Hidden files, like the temporary files of dump_json_atomically(), don't match.
+ID_MATCHER = re.compile(r"^(?!\.)(\D+?)([0-9]+)(?![0-9])")
+
+
+class TableIndex:
+    """An index of the id's and paths of the rows (files) in a table directory"""
+
+    def __init__(self, table_dir):
+        """Initiate the index. It is built on first use.
+
+        Args:
+            table_dir (Path-like): The directory containing the table's files
+        """
+        self.table_dir = Path(table_dir)
+        self._mtime = None  # the directory mtime at which the index was built
+        self._paths = {}  # {prefix: {id: path}}
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.table_dir})"
+
+    def refresh(self, force=False):
+        """Rebuild the index if the directory has changed since it was last built"""
+        try:
+            mtime = os.stat(self.table_dir).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if force or self._mtime is None or mtime != self._mtime:
+            self.build()
+            self._mtime = mtime
+
+    def build(self):
+        """Read the file names of the table directory and index them by prefix and id"""
+        paths = {}
+        if not self.table_dir.exists():
+            self._paths = paths
+            return
+        with os.scandir(self.table_dir) as entries:
+            for entry in entries:
+                id_match = ID_MATCHER.search(entry.name)
+                if not id_match:
+                    continue  # e.g. the counter file or TREND.json
+                prefix, r_id = id_match.group(1), int(id_match.group(2))
+                paths_with_prefix = paths.setdefault(prefix, {})
+                if r_id in paths_with_prefix:
+                    print(
+                        f"WARNING!!! '{entry.name}' has the same id as "
+                        f"'{paths_with_prefix[r_id].name}' in {self.table_dir}. "
+                        f"Ignoring it."
+                    )
+                    continue
+                paths_with_prefix[r_id] = Path(entry.path)
+        self._paths = paths
+
+    def get_path(self, prefix, r_id):
+        """Return the path to the file of the row with the given prefix and id
+
+        Args:
+            prefix (str): The start of the file name before the id, e.g. "m" or "ic"
+            r_id (int or str): The id of the row.
+        Raises:
+            FileNotFoundError if there is no such row.
+        """
+        self.refresh()
+        try:
+            return self._paths[prefix][int(r_id)]
+        except (KeyError, TypeError, ValueError):
+            raise FileNotFoundError(f"no file for {prefix}{r_id} in {self.table_dir}")
+
+    def ids(self, prefix):
+        """Return a sorted list of the id's of the rows with the given prefix"""
+        self.refresh()
+        return sorted(self._paths.get(prefix, {}))
+
+    def items(self, prefix):
+        """Yield (id, path) for rows with the given prefix in order of their id"""
+        self.refresh()
+        paths_with_prefix = self._paths.get(prefix, {})
+        for r_id in sorted(paths_with_prefix):
+            yield r_id, paths_with_prefix[r_id]
+
+
+_table_indeces = {}  # {table_dir: TableIndex}, see get_table_index()
+
+
+def get_table_index(table_dir):
+    """Return the (shared) TableIndex of table_dir, making it if needed"""
+    key = os.path.normcase(os.path.abspath(table_dir))
+    if key not in _table_indeces:
+        _table_indeces[key] = TableIndex(table_dir)
+    return _table_indeces[key]
@@ -1,18 +1,32 @@
 """this module implements methods and classes around point results"""
-from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import json
+import time
 import numpy as np
 
 from .calc import (
     calc_OER_rate,
     calc_dissolution_rate,
+    calc_dissolution_rates_over_tspans,
     calc_exchange_rate,
     calc_potential,
     calc_current,
+    calc_rates,
 )
 from .tools import singleton_decorator, CounterWithFile
-from .constants import TOF_DIR, TOF_ID_FILE, FARADAY_CONSTANT
+from .batch_save import save_json
+from .table_index import get_table_index
+from .table_cache import get_table_cache
+from .relation_index import get_relation_index
+from .constants import (
+    TOF_DIR,
+    TOF_ID_FILE,
+    EXPERIMENT_DIR,
+    MEASUREMENT_DIR,
+    FARADAY_CONSTANT,
+)
 from .experiment import open_experiment
+from .sample import get_element_and_type
 
 
 @singleton_decorator
@@ -23,21 +37,48 @@ class TOFCounter(CounterWithFile):
 
 
 def all_tofs(tof_dir=TOF_DIR):
-    """returns an iterator that yields measurements in order of their id"""
+    """returns an iterator that yields measurements in order of their id
+
+    The TOFs get their m_id, sample_name, and date from get_experiment_metadata(), so
+    that they don't need to open their experiment unless a result is calculated.
+    """
     N_tofs = TOFCounter().last()
-    for n in range(1, N_tofs + 1):
-        try:
-            tof = TurnOverFrequency.open(n, tof_dir=tof_dir)
-        except FileNotFoundError as e:
-            continue
-        else:
-            yield tof
+    experiment_metadata = get_experiment_metadata()
+    for t_id, path_to_file, self_as_dict in get_table_cache(tof_dir).rows("t", N_tofs):
+        metadata = experiment_metadata.get(self_as_dict.get("e_id"), {})
+        for key, value in metadata.items():
+            if self_as_dict.get(key) is None:
+                self_as_dict[key] = value
+        yield TurnOverFrequency.from_dict(self_as_dict)
+
+
+def get_experiment_metadata(
+    experiment_dir=EXPERIMENT_DIR, measurement_dir=MEASUREMENT_DIR
+):
+    """Return {e_id: {"m_id": m_id, "sample_name": sample_name, "date": date}}
+
+    The metadata is read from the contents of the experiment and measurement files
+    (via their table caches) without initiating any Experiment or Measurement.
+    """
+    measurement_metadata = {
+        m_id: {"sample_name": m_as_dict.get("sample"), "date": m_as_dict.get("date")}
+        for m_id, path, m_as_dict in get_table_cache(measurement_dir).rows("m")
+    }
+    experiment_metadata = {}
+    for e_id, path, e_as_dict in get_table_cache(experiment_dir).rows("e"):
+        m_id = e_as_dict.get("m_id")
+        experiment_metadata[e_id] = dict(
+            m_id=m_id, **measurement_metadata.get(m_id, {})
+        )
+    return experiment_metadata
 
 
 def all_tof_sets(tof_dir=TOF_DIR):
     tof_sets = {}
     for tof in all_tofs(tof_dir=tof_dir):
         e_id = tof.e_id
+        if not (e_id and tof.tspan):
+            continue  # e.g. ec_activity TOFs without experiment can't be in a set
         tspan = tuple(int(t) for t in tof.tspan)
         if not (e_id, tspan) in tof_sets:
             tof_sets[(e_id, tspan)] = TurnOverSet()
@@ -45,6 +86,294 @@ def all_tof_sets(tof_dir=TOF_DIR):
     yield from tof_sets.values()
 
 
+def load_frame(
+    tof_dir=TOF_DIR, experiment_dir=EXPERIMENT_DIR, measurement_dir=MEASUREMENT_DIR
+):
+    """Return a TOFFrame with the stored results of all the TurnOverFrequency's
+
+    The frame is built from the contents of the tof, experiment, and measurement
+    files (via their table caches) without initiating any TOF, Experiment, or
+    Measurement objects. Results which are not stored are nan in the frame.
+
+    Args:
+        tof_dir (Path-like): The directory of the tof table
+        experiment_dir (Path-like): The directory of the experiment table, used to
+            look up the m_id of each TOF's experiment
+        measurement_dir (Path-like): The directory of the measurement table, used to
+            look up the sample name of each TOF's measurement
+    """
+    experiment_metadata = get_experiment_metadata(
+        experiment_dir=experiment_dir, measurement_dir=measurement_dir
+    )
+
+    N_tofs = TOFCounter().last()
+    columns = {column: [] for column in TOFFrame.columns}
+    tof_types = []
+    sample_names = []
+    for t_id, path_to_file, tof_as_dict in get_table_cache(tof_dir).rows("t", N_tofs):
+        e_id = tof_as_dict.get("e_id")
+        sample_name = tof_as_dict.get("sample_name") or experiment_metadata.get(
+            e_id, {}
+        ).get("sample_name")
+        tof_type = tof_as_dict.get("tof_type")
+        tspan = tof_as_dict.get("tspan") or [None, None]
+        if tof_type not in tof_types:
+            tof_types.append(tof_type)
+        if sample_name and sample_name not in sample_names:
+            sample_names.append(sample_name)
+
+        columns["t_id"].append(t_id)
+        columns["e_id"].append(e_id if e_id is not None else -1)
+        columns["tof_type"].append(tof_types.index(tof_type))
+        columns["t_start"].append(tspan[0])
+        columns["t_end"].append(tspan[-1])
+        for result in ["rate", "tof", "potential", "current", "amount"]:
+            columns[result].append(tof_as_dict.get(result))
+        columns["sample_name"].append(
+            sample_names.index(sample_name) if sample_name else -1
+        )
+
+    columns = {
+        column: np.array(values, dtype=TOFFrame.columns[column])
+        for column, values in columns.items()
+    }
+    return TOFFrame(columns, tof_types=tof_types, sample_names=sample_names)
+
+
+def recalculate_all(workers=None, tof_dir=TOF_DIR):
+    """Recalculate and save the results of all the TOFs which have an experiment
+
+    The TOFs are grouped by experiment, and each experiment is a task for a pool of
+    worker processes. A task opens the experiment (and so loads its data) once and
+    recalculates and saves all of its TOFs. See recalculate_experiment_tofs()
+
+    Args:
+        workers (int): The number of worker processes. Defaults to the number of cpus.
+            If workers is 1, the experiments are recalculated in this process.
+        tof_dir (Path-like): The directory of the tof table
+    Returns dict: {e_id: time in [s] spent recalculating that experiment's TOFs}
+    """
+    t_ids_by_e_id = {}
+    for tof in all_tofs(tof_dir=tof_dir):
+        if not tof.e_id:
+            print(f"skipping '{tof}' as it has no experiment.")
+            continue
+        t_ids_by_e_id.setdefault(tof.e_id, []).append(tof.id)
+
+    timings = {}
+
+    def report(e_id, t_ids, result):
+        N_done, seconds, error = result
+        timings[e_id] = seconds
+        if error:
+            print(f"FAILED on e{e_id} after {seconds:.1f} s due to error = {error}")
+        else:
+            print(
+                f"e{e_id}: recalculated {N_done}/{len(t_ids)} TOFs in {seconds:.1f} s"
+            )
+
+    t0 = time.time()
+    if workers == 1:
+        for e_id, t_ids in t_ids_by_e_id.items():
+            report(e_id, t_ids, recalculate_experiment_tofs(e_id, t_ids, tof_dir))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(recalculate_experiment_tofs, e_id, t_ids, tof_dir): (
+                    e_id,
+                    t_ids,
+                )
+                for e_id, t_ids in t_ids_by_e_id.items()
+            }
+            for future in as_completed(futures):
+                e_id, t_ids = futures[future]
+                report(e_id, t_ids, future.result())
+    print(
+        f"recalculated TOFs of {len(timings)} experiments in {time.time() - t0:.1f} s"
+    )
+    return timings
+
+
+def recalculate_experiment_tofs(e_id, t_ids, tof_dir=TOF_DIR):
+    """Recalculate and save the TOFs with id in t_ids, which are all from e_id
+
+    This is the task done by each worker in recalculate_all(). The experiment is
+    opened once and given to all the TOFs, so that its data is only loaded once.
+    Errors are returned rather than raised so that one bad experiment doesn't stop
+    the others.
+
+    Returns tuple: (number of TOFs saved, time taken in [s], error or None)
+    """
+    t0 = time.time()
+    N_done = 0
+    try:
+        experiment = open_experiment(e_id)
+        tofs = [
+            TurnOverFrequency.open(t_id, tof_dir=tof_dir, experiment=experiment)
+            for t_id in t_ids
+        ]
+        tofs_not_batched = calc_batched_rates(tofs, experiment)
+        for tof in tofs:
+            if tof in tofs_not_batched:
+                tof.calc_rate()
+            if tof.tof_type == "activity":
+                tof.calc_tof()
+                tof.calc_faradaic_efficiency()
+            tof.fill_metadata()
+            tof.save()
+            N_done += 1
+    except Exception as e:  # noqa
+        return N_done, time.time() - t0, repr(e)
+    return N_done, time.time() - t0, None
+
+
+def calc_batched_rates(tofs, experiment):
+    """Calculate the rates of the TOFs of experiment together
+
+    The average fluxes over all the tspans of the activity and exchange TOFs are
+    calculated with one calc_rates() call, i.e. one pass over the data per mol,
+    rather than one per TOF and mol. The dissolution rates over all the tspans of the
+    dissolution TOFs are calculated with one call to
+    calc_dissolution_rates_over_tspans() per t_electrolysis. The rates are set for
+    the TOFs, but not saved.
+
+    Returns list of TurnOverFrequency: The TOFs whose rates were not calculated, i.e.
+        TOFs with other rate_calc_kwargs.
+    """
+    flux_tofs = [
+        tof
+        for tof in tofs
+        if tof.tof_type in ("activity", "exchange") and not tof.rate_calc_kwargs
+    ]
+    if flux_tofs:
+        mols = []
+        if any(tof.tof_type == "activity" for tof in flux_tofs):
+            mols += experiment.mol_list
+        if any(tof.tof_type == "exchange" for tof in flux_tofs):
+            mols += [mol for mol in ["O2_M32", "O2_M34"] if mol not in mols]
+        rates = calc_rates(experiment, [tof.tspan for tof in flux_tofs], mols=mols)
+        for i, tof in enumerate(flux_tofs):
+            if tof.tof_type == "activity":
+                tof._rate = sum(rates[mol][i] for mol in experiment.mol_list)
+            else:
+                tof._rate = rates["O2_M34"][i] - rates["O2_M32"][i] * experiment.beta
+
+    dissolution_tofs = [
+        tof
+        for tof in tofs
+        if tof.tof_type == "dissolution"
+        and set(tof.rate_calc_kwargs or {}) <= {"t_electrolysis"}
+    ]
+    tofs_by_t_electrolysis = {}
+    for tof in dissolution_tofs:
+        t_electrolysis = (tof.rate_calc_kwargs or {}).get("t_electrolysis")
+        tofs_by_t_electrolysis.setdefault(t_electrolysis, []).append(tof)
+    for t_electrolysis, tofs_to_calc in tofs_by_t_electrolysis.items():
+        rates = calc_dissolution_rates_over_tspans(
+            experiment,
+            [tof.tspan for tof in tofs_to_calc],
+            t_electrolysis=t_electrolysis,
+        )
+        for tof, rate in zip(tofs_to_calc, rates):
+            tof._rate = rate
+
+    batched_tofs = flux_tofs + dissolution_tofs
+    return [tof for tof in tofs if tof not in batched_tofs]
+
+
+class TOFFrame:
+    """A struct-of-arrays view of the stored results of many TurnOverFrequency's
+
+    Each column is a numpy array with one entry per TOF, and can be gotten by indexing
+    the frame with its name, e.g. frame["rate"]. Indexing the frame with a boolean mask
+    (or an array of indeces) returns a TOFFrame with just those TOFs. The columns are:
+        t_id, e_id: The TOF's id and the id of its experiment (-1 for none)
+        tof_type: Integer code for the TOF type. The type is frame.tof_types[code]
+        t_start, t_end: The start and end of the TOF's tspan in [s]
+        rate, tof, potential, current, amount: The stored results, nan if not stored
+        sample_name: Integer code for the sample. The name is frame.sample_names[code].
+            The code is -1 if the sample name is not known.
+
+    Example, the rates of Reshma activity TOFs above 1.5 V_RHE:
+        >>> frame = load_frame()
+        >>> mask = (
+        ...     frame.tof_type_is("activity")
+        ...     & frame.sample_name_contains("Reshma")
+        ...     & (frame["potential"] > 1.5)
+        ... )
+        >>> rates = frame[mask]["rate"]
+    """
+
+    columns = {
+        "t_id": int,
+        "e_id": int,
+        "tof_type": int,
+        "t_start": float,
+        "t_end": float,
+        "rate": float,
+        "tof": float,
+        "potential": float,
+        "current": float,
+        "amount": float,
+        "sample_name": int,
+    }
+
+    def __init__(self, columns, tof_types, sample_names):
+        """Initiate a TOFFrame. Normally this is done with load_frame()
+
+        Args:
+            columns (dict): {column_name: np.array} for all of TOFFrame.columns
+            tof_types (list of str): The tof types, indexed by the tof_type codes
+            sample_names (list of str): The sample names, indexed by sample_name codes
+        """
+        self._columns = columns
+        self.tof_types = list(tof_types)
+        self.sample_names = list(sample_names)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(<{len(self)} TOFs>)"
+
+    def __len__(self):
+        return len(self._columns["t_id"])
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self._columns[key]
+        return TOFFrame(
+            {column: values[key] for column, values in self._columns.items()},
+            tof_types=self.tof_types,
+            sample_names=self.sample_names,
+        )
+
+    def tof_type_is(self, *tof_types):
+        """Return a boolean mask for the TOFs which have any of the given tof_types"""
+        codes = [self.tof_types.index(t) for t in tof_types if t in self.tof_types]
+        return np.isin(self._columns["tof_type"], codes)
+
+    def sample_name_contains(self, *strings):
+        """Return a boolean mask for the TOFs with a sample name containing any string"""
+        codes = [
+            code
+            for code, sample_name in enumerate(self.sample_names)
+            if any(s in sample_name for s in strings)
+        ]
+        return np.isin(self._columns["sample_name"], codes)
+
+    def get_sample_names(self):
+        """Return an array with the sample name (or None) of each TOF"""
+        sample_names = np.array(self.sample_names + [None], dtype=object)
+        return sample_names[self._columns["sample_name"]]  # -1 gives None
+
+    def get_tof_types(self):
+        """Return an array with the tof_type of each TOF"""
+        return np.array(self.tof_types, dtype=object)[self._columns["tof_type"]]
+
+    @property
+    def t_interval(self):
+        """np.array: The length of electrolysis time covered by each TOF"""
+        return self._columns["t_end"] - self._columns["t_start"]
+
+
 class TurnOverSet:
     def __init__(
         self,
@@ -58,7 +387,8 @@ class TurnOverSet:
         """
         self.t_ids = t_ids or {}
         self._tofs = {}
-        self.experiment = None
+        self.e_id = None
+        self._experiment = None
         self.tspan = None
 
     def __contains__(self, item):
@@ -69,12 +399,12 @@ class TurnOverSet:
 
     def add_tof(self, tof):
         tof_type = tof.tof_type
+        if self.e_id is None:
+            self.e_id = tof.e_id
+        elif not (tof.e_id == self.e_id):
+            raise TypeError(f"can't add {tof} to {self} as experiment is not the same")
         self.t_ids[tof_type] = tof.id
         self._tofs[tof_type] = tof
-        if not self.experiment:
-            self.experiment = tof.experiment
-        elif not (tof.experiment.id == self.experiment.id):
-            raise TypeError(f"can't add {tof} to {self} as experiment is not the same")
         if not self.tspan:
             self.tspan = tof.tspan
         elif not (tof.tspan[0] == self.tspan[0]):
@@ -84,13 +414,13 @@ class TurnOverSet:
         if item in self._tofs:
             return self._tofs[item]
         elif item in self.t_ids:
-            if self.experiment:
+            if self._experiment:
                 self._tofs[item] = TurnOverFrequency.open(
-                    self.t_ids[item], experiment=self.experiment
+                    self.t_ids[item], experiment=self._experiment
                 )
             else:
                 self._tofs[item] = TurnOverFrequency.open(self.t_ids[item])
-                self.experiment = self._tofs[item].experiment
+                self.e_id = self._tofs[item].e_id
             return self._tofs[item]
         raise KeyError(f"{self} does not have tof for {item}")
 
@@ -101,17 +431,30 @@ class TurnOverSet:
         yield from self._tofs.values()
 
     def __getattr__(self, item):
+        if item.startswith("_"):  # avoids recursion before __init__ is done
+            raise AttributeError(item)
         try:
             return self.get_tof(item)
         except KeyError as e:
             raise AttributeError(e)
 
+    @property
+    def experiment(self):
+        """The experiment of the TOFs. Only opened when needed."""
+        if not self._experiment and self.e_id is not None:
+            self._experiment = open_experiment(self.e_id)
+            for tof in self._tofs.values():
+                tof.experiment = self._experiment
+        return self._experiment
+
     @property
     def sample(self):
         return self.experiment.sample
 
     @property
     def sample_name(self):
+        for tof in self._tofs.values():
+            return tof.sample_name
         return self.experiment.sample_name
 
 
@@ -148,6 +491,9 @@ class TurnOverFrequency:
         description=None,
         t_id=None,
         amount=None,
+        m_id=None,
+        date=None,
+        element=None,
     ):
         """Iinitiate a TurnOverFrequency
 
@@ -164,6 +510,12 @@ class TurnOverFrequency:
             rate_calc_kwargs (dict): Extra kwargs for the relevant rate calc. function.
             description (str): free-form description of the TOF point
             t_id (int): The principle key. Defaults to incrementing the counter
+            amount (float): The amount, if known, in [mol]
+            m_id (int): The id of the experiment's measurement, if known.
+            date (str): The date of the experiment's measurement, if known.
+            element (str): The element of the sample, if known.
+            The metadata (sample_name, m_id, date, element) is stored with the TOF so
+            that the experiment is only opened if a result needs to be calculated.
         """
         self.tof_type = tof_type
         self.e_id = e_id
@@ -180,6 +532,9 @@ class TurnOverFrequency:
         self.id = t_id or TOFCounter().id
         self._rate = rate
         self._amount = amount
+        self._m_id = m_id
+        self._date = date
+        self._element = element
 
     def as_dict(self):
         """The dictionary represnetation of the TOF's metadata"""
@@ -197,20 +552,46 @@ class TurnOverFrequency:
             t_id=self.id,
             amount=self._amount,
             sample_name=self._sample_name,
+            m_id=self._m_id,
+            date=self._date,
+            element=self._element,
         )
 
+    def fill_metadata(self):
+        """Look up the sample_name, m_id, date, and element, to be saved with the TOF
+
+        The experiment and its measurement are only opened if the TOF has one and
+        some of the metadata is missing. This is done where the TOFs are calculated,
+        so that as_dict() and save() don't open anything.
+        """
+        if not (self._sample_name and self._m_id is not None and self._date) and (
+            self._experiment or self.e_id
+        ):
+            measurement = self.measurement
+            if self._m_id is None:
+                self._m_id = measurement.id
+            self._date = self._date or measurement.date
+            self._sample_name = self._sample_name or measurement.sample_name
+        if not self._element and self._sample_name:
+            self._element = get_element_and_type(self._sample_name, get="element")
+
     def save(self):
         """Save the TOF's metadata to a .json file"""
         self_as_dict = self.as_dict()
         path_to_file = TOF_DIR / f"{self}.json"
-        with open(path_to_file, "w") as f:
-            json.dump(self_as_dict, f, indent=4)
+        with get_relation_index(TOF_DIR, "t", "e_id").saving(self.id, self.e_id):
+            save_json(self_as_dict, path_to_file, atomic=True, indent=4)
 
     @classmethod
     def load(cls, path_to_file, **kwargs):
         """Load a TOF from the metadata stored in a file"""
         with open(path_to_file, "r") as f:
             self_as_dict = json.load(f)
+        return cls.from_dict(self_as_dict, **kwargs)
+
+    @classmethod
+    def from_dict(cls, self_as_dict, **kwargs):
+        """Initiate a TOF from the contents of its file, updated with kwargs"""
         self_as_dict.update(kwargs)
         return cls(**self_as_dict)
 
@@ -218,17 +599,15 @@ class TurnOverFrequency:
     def open(cls, t_id, tof_dir=TOF_DIR, **kwargs):
         """Opens the measurement given its id"""
         try:
-            path_to_file = next(
-                path
-                for path in Path(tof_dir).iterdir()
-                if path.stem.startswith(f"t{t_id}")
-            )
-        except StopIteration:
+            path_to_file = get_table_index(tof_dir).get_path("t", t_id)
+        except FileNotFoundError:
             raise FileNotFoundError(f"no TurnOverFrequency with id = t{t_id}")
         return cls.load(path_to_file, **kwargs)
 
     def __repr__(self):
-        if not self.experiment:
+        if not (self._sample_name and self._date) and not (
+            self._experiment or self.e_id and self.experiment
+        ):
             return f"t{self.id} is {self.tof_type} without experiment in pyOER"
         return f"t{self.id} is {self.tof_type} on {self.sample_name} on {self.date}"
 
@@ -242,33 +621,50 @@ class TurnOverFrequency:
             self._experiment = open_experiment(self.e_id)
         return self._experiment
 
+    @experiment.setter
+    def experiment(self, experiment):
+        self._experiment = experiment
+
     @property
     def measurement(self):
         if not self.experiment:
             return None
         return self.experiment.measurement
 
+    @property
+    def m_id(self):
+        if self._m_id is None and self.measurement:
+            self._m_id = self.measurement.id
+        return self._m_id
+
     @property
     def date(self):
-        if not self.measurement:
-            return None
-        return self.measurement.date
+        if not self._date and self.measurement:
+            self._date = self.measurement.date
+        return self._date
 
     @property
     def sample(self):
-        return self.measurement.sample
+        if self._experiment or not self.sample_name:
+            return self.measurement.sample
+        from .sample import Sample
+
+        try:
+            return Sample.open(self.sample_name)
+        except FileNotFoundError:
+            return Sample(name=self.sample_name)
 
     @property
     def sample_name(self):
-        if self._sample_name:
-            return self._sample_name
-        if not self.measurement:
-            return None
-        return self.measurement.sample_name
+        if not self._sample_name and self.measurement:
+            self._sample_name = self.measurement.sample_name
+        return self._sample_name
 
     @property
     def element(self):
-        return self.sample.element
+        if not self._element and self.sample_name:
+            self._element = get_element_and_type(self.sample_name, get="element")
+        return self._element
 
     @property
     def t_interval(self):
@@ -290,6 +686,7 @@ class TurnOverFrequency:
         """Calculate and return the relevant rate in [mol/s]"""
         if not self.experiment:
             return
+        self.fill_metadata()
         rate_calc_kwargs = self.rate_calc_kwargs
         rate_calc_kwargs.update(kwargs)
         rate = self.rate_calculating_function(
@@ -367,8 +764,9 @@ class TurnOverFrequency:
         act_tof = None
         diss_tof = None
         exc_tof = None
-        for tof in self.experiment.get_tofs():
-            if not tof.tspan == self.tspan:
+        for t_id in get_relation_index(TOF_DIR, "t", "e_id").get_ids(self.e_id):
+            tof = TurnOverFrequency.open(t_id, experiment=self._experiment)
+            if not (tof.e_id == self.e_id and tof.tspan == self.tspan):
                 continue
             if tof.tof_type == "activity":
                 act_tof = tof
@@ -1,6 +1,15 @@
 """This module defines some pythony and mathy stuff used elsewhere"""
+from contextlib import contextmanager
+from pathlib import Path
+import json
+import os
 import numpy as np
-from scipy.optimize import curve_fit
+
+try:
+    import fcntl
+except ImportError:  # on Windows
+    fcntl = None
+    import msvcrt
 
 
 # a regular expression to match floats like '-3.5e4' or '7' or '245.13' or '1e-15':
@@ -29,10 +38,24 @@ class CounterWithFile:
 
     Classes that inherit from this must override: _file
     Classes inheriting from this should maybe be decorated with @singleton_decorator
+
+    The file holds the last id claimed by any process. Id's are claimed with the file
+    locked (see file_lock()), so processes working on the same table at the same time
+    never get the same id. A process can claim a block of id's at once, with
+    reserve() or by setting block_size, and hand them out from memory. Id's of a
+    block which are not used can be given back with release(), as long as no other
+    process has claimed id's since. Otherwise they are left as gaps in the table.
+    Id's are never given back from before the blocks which this process claimed one
+    after the other (with no id's claimed by others in between), so that release()
+    can't give back id's which another process is using.
     """
 
     _id = None
     _file = None
+    block_size = 1  # the number of id's to claim from the file when out of id's
+    _block = None  # [next id, last id] claimed and not yet handed out
+    _block_pid = None  # the process which claimed _block (it's not a fork's)
+    _claimed = None  # [first id, last id] claimed in a row by this process
 
     def last(self):
         """Return the last id"""
@@ -43,29 +66,164 @@ class CounterWithFile:
 
     @property
     def id(self):
-        """Iterate id and return the new id"""
-        with open(self._file, "r") as f:
-            self._id = int(f.read()) + 1
-        with open(self._file, "w") as f:
-            f.write(str(self._id))
+        """Iterate id and return the new id. In a batch, the file is written later."""
+        from .batch_save import get_active_batch
+
+        batch = get_active_batch()
+        if batch is not None:
+            return batch.new_id(self)
+        return self.next_id()
+
+    def next_id(self, block_size=None):
+        """Return the next id, from the block if there is one, else claiming a block
+
+        Args:
+            block_size (int): The number of id's to claim if out of id's. Defaults
+                to self.block_size
+        """
+        if (
+            self._block is None
+            or self._block_pid != os.getpid()
+            or self._block[0] > self._block[1]
+        ):
+            self.reserve(block_size or self.block_size)
+        self._id = self._block[0]
+        self._block[0] += 1
         return self._id
 
+    def reserve(self, n):
+        """Claim the next n id's in the file for this process. They are handed out by id
+
+        Any id's left from an earlier block of this process are released first.
+
+        Returns range: The id's claimed
+        """
+        self.release()
+        with file_lock(self._file):
+            with open(self._file, "r") as f:
+                last_id = int(f.read())
+            write_atomically(self._file, lambda f: f.write(str(last_id + n)))
+        if (
+            self._claimed is None
+            or self._block_pid != os.getpid()
+            or self._claimed[1] != last_id
+        ):
+            self._claimed = [last_id + 1, last_id]  # others claimed id's since
+        self._claimed[1] = last_id + n
+        self._block = [last_id + 1, last_id + n]
+        self._block_pid = os.getpid()
+        return range(last_id + 1, last_id + n + 1)
 
-def fit_exponential(t, y, zero_time_axis=False):
+    def release(self, first_id=None):
+        """Give back the claimed id's from first_id, if no other process claimed since
+
+        Args:
+            first_id (int): The first id to give back. Defaults to the next id of the
+                block, i.e. only those not handed out are given back. Id's from
+                before a block claimed by another process are not given back.
+
+        Returns bool: Whether the id's were given back
+        """
+        if self._block is None or self._block_pid != os.getpid():
+            self._block = None
+            self._claimed = None
+            return False
+        first_id = max(first_id or self._block[0], self._claimed[0])
+        last_id = self._block[1]
+        self._block = None
+        if first_id > last_id:
+            return False
+        with file_lock(self._file):
+            with open(self._file, "r") as f:
+                if int(f.read()) != last_id:
+                    self._claimed = None
+                    return False  # another process has claimed id's after the block
+            write_atomically(self._file, lambda f: f.write(str(first_id - 1)))
+        self._claimed[1] = first_id - 1
+        self._id = None  # so that last() reads the file again
+        return True
+
+
+@contextmanager
+def file_lock(path_to_file):
+    """Context manager holding an exclusive lock for path_to_file between processes
+
+    The lock is on a hidden ".<name>.lock" file next to path_to_file, since
+    path_to_file itself may be replaced by write_atomically() while locked. It waits
+    for other processes holding the lock to release it.
+    """
+    path_to_file = Path(path_to_file)
+    path_to_lock = path_to_file.with_name(f".{path_to_file.name}.lock")
+    with open(path_to_lock, "a") as f:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:  # on Windows. msvcrt.locking retries for 10 seconds, then raises
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield path_to_lock
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def write_atomically(path_to_file, write, mode="w", fsync=True):
+    """Write to path_to_file with write(f) such that it is never left half-written
+
+    write(f) writes to a hidden temporary file in the same folder, which then
+    replaces path_to_file.
+
+    Args:
+        path_to_file (Path-like): The file to write
+        write (callable): A function that takes the open file and writes to it
+        mode (str): The mode to open the temporary file with, "w" or "wb"
+        fsync (bool): Whether to make sure the file is on disk before it replaces
+            path_to_file. Only skip this if the caller syncs afterwards.
+    """
+    path_to_file = Path(path_to_file)
+    path_to_temp = path_to_file.with_name(f".{path_to_file.name}.{os.getpid()}.tmp")
+    try:
+        with open(path_to_temp, mode) as f:
+            write(f)
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+        os.replace(path_to_temp, path_to_file)
+    finally:
+        if path_to_temp.exists():
+            path_to_temp.unlink()
+
+
+def dump_json_atomically(obj, path_to_file, **kwargs):
+    """json.dump obj to path_to_file such that the file is never left half-written
+
+    kwargs (e.g. indent=4) are passed on to json.dump. See write_atomically()
+    """
+    write_atomically(path_to_file, lambda f: json.dump(obj, f, **kwargs))
+
+
+def fit_exponential(t, y, zero_time_axis=False, p0=None):
     """Return (tao, y0, y1) for best fit of y = y0 + (y1-y0) * exp(-t/tao)
 
     Args:
         t (vector): time
         y (vector): values
         zero_time_axix (boolean): whether to subtract t[0] from t. False by default
+        p0 (list of float): initial guess at [tao, y0, y1], e.g. a previous fit.
+            Defaults to a guess based on t and y.
     """
+    from scipy.optimize import curve_fit
+
     if zero_time_axis:
         t = t - t[0]  # zero time axis
     tau_i = t[-1] / 10  # guess at time constant
     # tau_i = t[-1]      #often can't solve with this guess. A smaller tau helps.
     y0_i = y[-1]  # guess at approach value
     y1_i = y[0]  # guess at true initial value
-    pars_i = [tau_i, y0_i, y1_i]
+    pars_i = [tau_i, y0_i, y1_i] if p0 is None else list(p0)
 
     def exp_fun(x, tau, y0, y1):
         z = y0 + (y1 - y0) * np.exp(-x / tau)
@@ -0,0 +1,346 @@
+"""Time imports, table access, and analysis in pyOER on synthetic projects
+
+Usage:
+    python tests/benchmarks/run_benchmarks.py --sizes 10 100 1000 --output bench.json
+
+For each size, a synthetic project with that many measurements is made (see
+synthetic.py), and each benchmark case is run in a new python process pointed to it,
+so that the timings are of a cold start (nothing imported or cached in memory). The
+sqlite table caches in tables/.cache are made by the first case that scans a table,
+so the scan cases report both the first ("cold") and a second ("warm") scan.
+
+The results are written as json with a list of rows like:
+    {"case": "scan_tofs", "size": 100, "seconds": 0.41, "n_items": 400, ...}
+and some metadata (pyOER version, git commit, python version, and platform), so that
+results from different versions can be compared.
+"""
+from pathlib import Path
+import argparse
+import datetime
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARK_DIR = Path(__file__).absolute().parent
+REPO_DIR = BENCHMARK_DIR.parent.parent
+SRC_DIR = REPO_DIR / "src"
+RESULT_TAG = "BENCHMARK RESULT: "  # starts the line with a case's result in its output
+EXCEPTION_MATCHER = re.compile(r"^[\w.]+(Error|Exception)\b")  # in a traceback
+
+CASES = {}  # {name: function}, filled by the @case decorator
+
+
+def case(function):
+    """Register function as a benchmark case, named without its "case_" prefix
+
+    A case is run in its own process. It returns a dict with at least "seconds".
+    """
+    CASES[function.__name__.replace("case_", "", 1)] = function
+    return function
+
+
+def timed(function, *args, **kwargs):
+    """Return (result of function(*args, **kwargs), time it took in [s])"""
+    t0 = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - t0
+
+
+# ------------------------- the benchmark cases ------------------------- #
+
+
+@case
+def case_import():
+    t0 = time.perf_counter()
+    import pyOER  # noqa
+
+    return dict(seconds=time.perf_counter() - t0)
+
+
+@case
+def case_import_tof():
+    t0 = time.perf_counter()
+    from pyOER import all_tofs  # noqa
+
+    return dict(seconds=time.perf_counter() - t0)
+
+
+@case
+def case_open_measurement():
+    from pyOER import Measurement, MeasurementCounter
+
+    N = MeasurementCounter().last()
+    m_ids = sorted({1 + i * N // 100 for i in range(min(N, 100))})
+    _, first_seconds = timed(Measurement.open, m_ids[0])  # also builds the index
+    _, seconds = timed(lambda: [Measurement.open(m_id) for m_id in m_ids])
+    return dict(
+        seconds=seconds,
+        n_items=len(m_ids),
+        seconds_per_item=seconds / len(m_ids),
+        first_seconds=first_seconds,
+    )
+
+
+def scan(all_rows):
+    """Return the timing dict of a cold and then a warm scan through all_rows()"""
+    rows, cold_seconds = timed(lambda: list(all_rows()))
+    _, warm_seconds = timed(lambda: list(all_rows()))
+    return dict(seconds=cold_seconds, warm_seconds=warm_seconds, n_items=len(rows))
+
+
+@case
+def case_scan_measurements():
+    from pyOER import all_measurements
+
+    return scan(all_measurements)
+
+
+@case
+def case_scan_experiments():
+    from pyOER import all_experiments
+
+    return scan(all_experiments)
+
+
+@case
+def case_scan_tofs():
+    from pyOER import all_tofs
+
+    return scan(all_tofs)
+
+
+@case
+def case_scan_icpms():
+    from pyOER import all_icpms_points
+
+    return scan(all_icpms_points)
+
+
+@case
+def case_load_frame():
+    from pyOER import load_frame
+
+    frame, seconds = timed(load_frame)
+    return dict(seconds=seconds, n_items=len(frame))
+
+
+@case
+def case_recalculate_tofs():
+    from pyOER import all_tofs, recalculate_experiment_tofs
+
+    # as recalculate_all(workers=1), but keeping the errors:
+    t_ids_by_e_id = {}
+    for tof in all_tofs():
+        t_ids_by_e_id.setdefault(tof.e_id, []).append(tof.id)
+    returns, seconds = timed(
+        lambda: [
+            recalculate_experiment_tofs(e_id, t_ids)
+            for e_id, t_ids in t_ids_by_e_id.items()
+        ]
+    )
+    n_items = sum(N_done for N_done, t, error in returns)
+    errors = [error for N_done, t, error in returns if error]
+    result = dict(seconds=seconds, n_items=n_items)
+    if errors:
+        result.update(error=errors[0], n_errors=len(errors))
+    return result
+
+
+@case
+def case_results_collection():
+    from pyOER import StabilityResultsCollection
+
+    collection, seconds = timed(
+        StabilityResultsCollection,
+        sample_mapping={"Ru": ["Reshma", "Nancy", "Easter", "Taiwan", "Stoff"]},
+        current_point_mapping={"0.5 mA/cm^2": 0.5, "0.05 mA/cm^2": 0.05},
+    )
+    n_items = sum(
+        len(t_ids)
+        for by_current in collection.tof_collection.values()
+        for by_time in by_current.values()
+        for by_type in by_time.values()
+        for t_ids in by_type.values()
+    )
+    return dict(seconds=seconds, n_items=n_items)
+
+
+@case
+def case_iss_fit():
+    from pyOER.constants import LEIS_DIR
+
+    if not LEIS_DIR.exists() or not any(LEIS_DIR.iterdir()):
+        return dict(seconds=None, skipped="no LEIS data in the project")
+    from pyOER import ISS
+
+    sample = sorted(path.stem for path in LEIS_DIR.rglob("*.json"))[0]
+    iss, load_seconds = timed(ISS, sample)
+    _, seconds = timed(iss.fit_with_reference, peaks=[[16, 18]], plot_result=False)
+    return dict(seconds=seconds, load_seconds=load_seconds, n_items=len(iss))
+
+
+# ------------------------- running the cases ------------------------- #
+
+
+def get_process_environment(project_dir):
+    """Return the environment for a python process using the synthetic project"""
+    from synthetic import get_environment
+
+    env = dict(os.environ)
+    env.update(get_environment(project_dir))
+    env["PYTHONPATH"] = os.pathsep.join(
+        [str(SRC_DIR), str(BENCHMARK_DIR)] + env.get("PYTHONPATH", "").split(os.pathsep)
+    ).strip(os.pathsep)
+    return env
+
+
+def make_synthetic_project(project_dir, size, duration=1800, data_files=None):
+    """Make the synthetic project in a new python process and return its row counts
+
+    The process is pointed to the project, as pyOER is imported to write its data.
+    """
+    arguments = [str(project_dir), "--measurements", str(size)]
+    arguments += ["--duration", str(duration)]
+    if data_files:
+        arguments += ["--data-files", str(data_files)]
+    subprocess.run(
+        [sys.executable, str(BENCHMARK_DIR / "synthetic.py")] + arguments,
+        env=get_process_environment(project_dir),
+        check=True,
+    )
+    with open(Path(project_dir) / "synthetic.json") as f:
+        return json.load(f)["counts"]
+
+
+def run_case(name, project_dir, timeout=None):
+    """Run the benchmark case in a new python process and return its result dict"""
+    try:
+        process = subprocess.run(
+            [sys.executable, __file__, "--case", name],
+            env=get_process_environment(project_dir),
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        return dict(seconds=None, error=f"timed out after {timeout} s")
+    for line in reversed(process.stdout.splitlines()):
+        if line.startswith(RESULT_TAG):
+            return json.loads(line[len(RESULT_TAG) :])
+    error_lines = process.stderr.strip().splitlines() or ["no result"]
+    exception_lines = [line for line in error_lines if EXCEPTION_MATCHER.match(line)]
+    return dict(seconds=None, error=(exception_lines or error_lines)[-1])
+
+
+def get_metadata():
+    """Return what's needed to compare results between versions and machines"""
+    with open(SRC_DIR / "pyOER" / "__init__.py") as f:
+        version = f.readline().split("=")[-1].strip().strip('"')
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=REPO_DIR,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except OSError:
+        commit = None
+    return dict(
+        pyOER_version=version,
+        git_commit=commit or None,
+        python_version=platform.python_version(),
+        platform=platform.platform(),
+        date=datetime.datetime.now().isoformat(timespec="seconds"),
+    )
+
+
+def run_benchmarks(
+    sizes,
+    cases=None,
+    project_dir=None,
+    duration=1800,
+    timeout=None,
+    data_files=None,
+):
+    """Make a synthetic project of each size and run the cases on it
+
+    Args:
+        sizes (list of int): The numbers of measurements in the synthetic projects
+        cases (list of str): The names of the cases to run. Defaults to all.
+        project_dir (Path-like): Where to make the projects, in a folder per size.
+            Defaults to a temporary directory, which is deleted afterwards.
+        duration (float): The length in [s] of each synthetic measurement
+        timeout (float): The time in [s] after which a case is stopped
+        data_files (int): The maximum number of EC-MS data files in each project.
+            See synthetic.make_project. Defaults to one per measurement.
+
+    Returns dict: {"metadata": get_metadata(), "results": list of result dicts}
+    """
+    cases = cases or list(CASES)
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for size in sizes:
+            size_dir = Path(project_dir or temp_dir) / f"synthetic_{size}"
+            counts, make_seconds = timed(
+                make_synthetic_project,
+                size_dir,
+                size,
+                duration=duration,
+                data_files=data_files,
+            )
+            print(f"made a synthetic project with {counts} in {make_seconds:.1f} s")
+            for name in cases:
+                result = dict(case=name, size=size)
+                result.update(run_case(name, size_dir, timeout=timeout))
+                results.append(result)
+                seconds = result["seconds"]
+                print(
+                    f"{name:>20} at size {size:>6}: "
+                    + (f"{seconds:.4f} s" if seconds is not None else "-")
+                    + (f" ({result['error']})" if "error" in result else "")
+                    + (
+                        f" (skipped: {result['skipped']})"
+                        if "skipped" in result
+                        else ""
+                    )
+                )
+    return dict(metadata=get_metadata(), results=results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--cases", nargs="+", choices=list(CASES))
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--project-dir", help="keep the synthetic projects here")
+    parser.add_argument("--duration", type=float, default=1800)
+    parser.add_argument("--timeout", type=float, default=None)
+    parser.add_argument("--data-files", type=int, default=None)
+    parser.add_argument("--case", help=argparse.SUPPRESS)  # used in the subprocess
+    args = parser.parse_args()
+
+    if args.case:
+        print(RESULT_TAG + json.dumps(CASES[args.case](), default=str), flush=True)
+        return
+    sys.path.insert(0, str(BENCHMARK_DIR))
+    sys.path.insert(0, str(SRC_DIR))
+    benchmarks = run_benchmarks(
+        sizes=args.sizes,
+        cases=args.cases,
+        project_dir=args.project_dir,
+        duration=args.duration,
+        timeout=args.timeout,
+        data_files=args.data_files,
+    )
+    with open(args.output, "w") as f:
+        json.dump(benchmarks, f, indent=4)
+    print(f"wrote the results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
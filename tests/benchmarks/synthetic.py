@@ -0,0 +1,667 @@
+"""Generate a synthetic pyOER project (tables and raw data) for benchmarks and tests
+
+make_project(project_dir, n_measurements) writes a tables/ folder like the one in this
+repository, which is self-consistent (every id referred to exists), with:
+    - samples
+    - measurements, with fake EC-MS data which ixdat can read
+    - elog entries (one per day of measurements) with RE_vs_RHE and Resistor fields
+    - MS calibrations and the calibration trend (calibrations/TREND.json)
+    - experiments, TOFs, ICPMS points and ICPMS calibrations
+    - LEIS json files (tables/leis) with the organized ISS pickles they refer to
+and a data folder (the DATA_DIR of the project) with the raw data. The EC-MS data is
+saved as memory-mapped data files (see pyOER/mmap_data.py), which Measurement reads
+in place of the EC_MS pickles, so that no raw data from the project is needed.
+
+pyOER is pointed to the synthetic project by the environment variables set by
+get_environment(project_dir), e.g.:
+    >>> make_project("/tmp/synthetic", n_measurements=100)
+    >>> os.environ.update(get_environment("/tmp/synthetic"))
+    >>> import pyOER  # now uses /tmp/synthetic/tables
+The environment variables have to be set before pyOER is imported.
+
+Or from the command line:
+    python tests/benchmarks/synthetic.py /tmp/synthetic --measurements 100000 \
+        --data-files 100
+The number of rows scales with the number of measurements, from about 10 to 100k
+(about 5 TOFs, 2 ICPMS points and 0.25 elog entries per measurement). Above a few
+thousand measurements, limit the number of data files: the measurements after the
+first data_files ones share (by hard link) the data of one of those.
+"""
+from pathlib import Path
+import argparse
+import datetime
+import json
+import os
+import pickle
+import shutil
+
+import numpy as np
+
+DATA_FOLDER_NAME = "synthetic data"  # the name of the DATA_DIR of the project
+TSTAMP_START = 1533502800  # PROJECT_START_TIMESTAMP, August 25, 2018
+MEASUREMENTS_PER_DAY = 4
+SAMPLE_BASES = {
+    # sample name base: (element, isotope of labeled O)
+    "Reshma": ("Ru", "16"),
+    "Nancy": ("Ru", "16"),
+    "Easter": ("Ru", "18"),
+    "Taiwan": ("Ru", "18"),
+    "Stoff": ("Ru", "18"),
+    "Bernie": ("Ru", "16"),
+    "Folk": ("Ir", "16"),
+    "Champ": ("Ir", "18"),
+    "Legend": ("Ir", "18"),
+    "Decade": ("Ir", "18"),
+    "Jazz": ("Ir", "16"),
+}
+ICPMS_MASSES = {"Ru": "M102", "Ir": "M193"}
+ICPMS_SAMPLES = {"2 min": 220, "20 min": 1300, "end": None}  # sampling time in [s]
+EC_POINTS_PER_SECOND = 2
+MS_POINTS_PER_SECOND = 1
+F_O2 = 0.25  # sensitivity factor in [C/mol] of the fake O2 signals
+A_EL = 0.196  # electrode area in [cm^2]
+RE_VS_RHE_STRINGS = ["0.715", "0.720", "0.717, calibrated", "0.730"]
+RESISTOR_STRINGS = ["100", "500 Ohm", ""]  # as in the elog. "" means not given.
+
+# The LEIS spectra, as measured with the thetaprobe (He+ at 1000 eV, 146.7 degrees)
+ISS_SETUP = dict(setup="thetaprobe", mass=4, theta=146.7, E0=1000)
+ISS_ENERGY = np.linspace(300, 1000, 701)  # [eV]
+ISS_OXYGEN_REGION = [360, 470]  # [eV], the region of the O16 and O18 peaks
+ISS_PEAK_WIDTH = 8  # [eV]
+ISS_METAL_MASSES = {"Ru": 101, "Ir": 192}
+
+
+def get_environment(project_dir):
+    """Return the environment variables which point pyOER to the synthetic project"""
+    project_dir = Path(project_dir).absolute()
+    return {
+        "PYOER_PROJECT_DIR": str(project_dir),
+        "PYOER_DATA_DIR": str(project_dir / DATA_FOLDER_NAME),
+    }
+
+
+def get_date_string(tstamp):
+    """Return the date of tstamp in the project's format, e.g. "18H27" for 2018-08-27"""
+    t = datetime.datetime.utcfromtimestamp(int(tstamp))
+    return f"{t.year % 100:02d}{'ABCDEFGHIJKL'[t.month - 1]}{t.day:02d}"
+
+
+def write_json(obj, path_to_file):
+    with open(path_to_file, "w") as f:
+        json.dump(obj, f, indent=4)
+
+
+def write_counter(path_to_file, last_id):
+    with open(path_to_file, "w") as f:
+        f.write(str(last_id))
+
+
+def link_or_copy(source, destination):
+    """Hard link destination to source (copy if hard links aren't supported)"""
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
+
+
+def make_ec_ms_data(duration, currents, seed=None):
+    """Return the time and data arrays of a fake EC-MS measurement
+
+    The measurement starts with 100 s of CV in the double layer region, followed by
+    constant-current steps with equal length, one for each of currents. The O2 signals
+    at M32, M34, and M36 are proportional to the current, plus background and noise.
+
+    Args:
+        duration (float): The length of the measurement in [s]
+        currents (list of float): The current in [mA] during each step
+        seed (int): Seed for the random noise
+
+    Returns dict: {series name: (time series name, data)} for the value series and
+        {series name: data} under the key "time series" for the time series.
+    """
+    random = np.random.default_rng(seed)
+    t_ec = np.arange(0, duration, 1 / EC_POINTS_PER_SECOND)
+    t_ms = np.arange(0, duration, 1 / MS_POINTS_PER_SECOND)
+    in_cv = t_ec < 100
+    sweep = np.abs((t_ec / 20) % 2 - 1)  # triangle wave between 0 and 1
+    step_length = (duration - 100) / max(len(currents), 1)
+    step_number = np.clip(((t_ec - 100) // step_length).astype(int), 0, None)
+    I_steps = np.array(currents or [0])[np.minimum(step_number, len(currents) - 1)]
+    I = np.where(in_cv, 0.005 * np.sign(np.gradient(sweep)), I_steps)
+    E = np.where(in_cv, 0.4 + 0.2 * sweep, 0.55 + 0.05 * np.log10(1 + np.abs(I)))
+    E += 1e-3 * random.standard_normal(t_ec.shape)
+    n_dot_O2 = np.interp(t_ms, t_ec, I) * 1e-3 / (4 * 96485)  # [mol/s]
+    data = {
+        "time series": {"time/s": t_ec, "M32-x": t_ms},
+        "Ewe/V": ("time/s", E),
+        "I/mA": ("time/s", I),
+        "cycle number": ("time/s", (t_ec > 100).astype(float)),
+    }
+    for mass, fraction in [("M32", 0.99), ("M34", 8e-3), ("M36", 2e-4)]:
+        signal = F_O2 * n_dot_O2 * fraction + 1e-12  # [A]
+        signal += 1e-13 * random.standard_normal(t_ms.shape)
+        data[f"{mass}-y"] = ("M32-x", signal)
+    return data
+
+
+def write_ec_ms_data(path_to_file, name, tstamp, data):
+    """Write fake EC-MS data (from make_ec_ms_data) as a memory-mapped data file"""
+    from ixdat import Measurement as Meas
+    from ixdat.data_series import TimeSeries, ValueSeries
+    from pyOER.mmap_data import export_mmap
+
+    time_series = {
+        t_name: TimeSeries(t_name, "s", t, tstamp=tstamp)
+        for t_name, t in data["time series"].items()
+    }
+    series_list = list(time_series.values())
+    for v_name, (t_name, v) in data.items():
+        if v_name == "time series":
+            continue
+        unit_name = {"Ewe/V": "V", "I/mA": "mA", "cycle number": ""}.get(v_name, "A")
+        series_list.append(
+            ValueSeries(v_name, unit_name, v, tseries=time_series[t_name])
+        )
+    meas = Meas.from_dict(
+        dict(name=name, technique="EC-MS", series_list=series_list, tstamp=tstamp)
+    )
+    export_mmap(meas, path_to_file)
+
+
+def get_iss_energy(mass):
+    """Return the energy in [eV] of He+ scattered off an atom with mass in [amu]"""
+    m0, E0 = ISS_SETUP["mass"], ISS_SETUP["E0"]
+    angle = ISS_SETUP["theta"] * np.pi / 180
+    root = np.sqrt(mass**2 - m0**2 * np.sin(angle) ** 2)
+    return E0 * ((m0 * np.cos(angle) + root) / (mass + m0)) ** 2
+
+
+def get_iss_peak(mass, height=1.0):
+    """Return a gaussian peak at the ISS_ENERGY of mass, in [counts/s]"""
+    x0 = get_iss_energy(mass)
+    return height * np.exp(-((ISS_ENERGY - x0) ** 2) / (2 * ISS_PEAK_WIDTH**2))
+
+
+def make_iss_reference():
+    """Return the ISS reference data, as expected in organized_pickles by pyOER.ISS
+
+    Returns dict: {setup: {mass: {"x", "xy", "background", "peak", "area", "region",
+        "file", "iss"}}}, for the O16 and O18 references.
+    """
+    reference = {}
+    for mass in [16, 18]:
+        peak = get_iss_peak(mass, height=1e3)
+        background = 50 + 0.01 * (ISS_ENERGY - ISS_ENERGY[0])
+        reference[mass] = dict(
+            x=ISS_ENERGY,
+            xy=np.vstack((ISS_ENERGY, peak + background)).T,
+            background=background,
+            peak=peak,
+            area=1e3 * ISS_PEAK_WIDTH * np.sqrt(2 * np.pi),  # of the gaussian
+            region=list(ISS_OXYGEN_REGION),
+            file=f"synthetic O{mass} reference",
+            iss=None,
+        )
+    return {ISS_SETUP["setup"]: reference}
+
+
+def make_iss_data(sample_name, element, O18_fraction, recorded, seed=None):
+    """Return an ISS spectrum as pyOER.iss.Data, as in the organized pickles
+
+    The spectrum has O16 and O18 peaks with the given O18_fraction and a peak of the
+    metal element on a sloping background, with noise.
+    """
+    from pyOER.iss import Data
+
+    random = np.random.default_rng(seed)
+    cps = 100 + 0.05 * (ISS_ENERGY - ISS_ENERGY[0])
+    cps = cps + get_iss_peak(16, 2e3 * (1 - O18_fraction))
+    cps = cps + get_iss_peak(18, 2e3 * O18_fraction)
+    cps = cps + get_iss_peak(ISS_METAL_MASSES[element], 5e3)
+    cps = cps + 10 * random.standard_normal(ISS_ENERGY.shape)
+
+    data = Data.__new__(Data)  # as Data(filename) would make it from the raw file
+    data.settings = {key: ISS_SETUP[key] for key in ["mass", "theta", "E0"]}
+    data.default_scan = 0
+    data.scans = 1
+    data.setup = ISS_SETUP["setup"]
+    data.format = "synthetic"
+    data.filename = f"synthetic/{sample_name}/He ISS.avg"
+    data.sample = sample_name
+    data.comment = ""
+    data.note = {0: "'synthetic'"}
+    data.date = recorded
+    data.energy = {0: ISS_ENERGY.copy()}
+    data.cps = {0: cps}
+    data.dwell = {0: 0.1}
+    data.mode = {0: 0}
+    data.mode_value = {0: 100.0}
+    data.peak_positions = None
+    data.peak_heights_raw = None
+    data.peak_heights_bg = None
+    data._background = None
+    data.background_settings = {"type": None, "ranges": None, "on": False}
+    return data
+
+
+def make_leis(project_dir, sample_names, n_leis=None, seed=0):
+    """Write LEIS json files for samples and the organized ISS pickles they refer to
+
+    Each sample gets one to three ISS spectra: as prepared and after each of up to two
+    series of measurements. Needs pyOER.iss (and so pickle5) to make the data objects.
+
+    Args:
+        project_dir (Path): The project folder
+        sample_names (list of str): The samples
+        n_leis (int): The number of samples to make LEIS for. Defaults to all.
+        seed (int): Seed for the random numbers
+
+    Returns int: The number of ISS spectra written
+    """
+    random = np.random.default_rng(seed)
+    leis_dir = project_dir / "tables" / "leis"
+    iss_dir = project_dir / DATA_FOLDER_NAME / "Data" / "ISS"
+    pickle_dir = iss_dir / "organized_pickles"
+    for folder in [leis_dir, pickle_dir, iss_dir / "pickled_pickles"]:
+        folder.mkdir(parents=True, exist_ok=True)
+    with open(pickle_dir / "iss_reference.pickle", "wb") as f:
+        pickle.dump(make_iss_reference(), f, pickle.HIGHEST_PROTOCOL)
+
+    n_spectra = 0
+    for i, sample_name in enumerate(sample_names[:n_leis]):
+        element, isotope = SAMPLE_BASES[sample_name.rstrip("ABCD0123456789")]
+        O18_fraction = 0.6 if isotope == "18" else 0.01
+        metadata = dict(
+            file=f"{sample_name}.json",
+            data={},
+            custom=dict(results={}, measurements={}),
+        )
+        for key in range(1 + i % 3):
+            n_spectra += 1
+            recorded = datetime.datetime.utcfromtimestamp(
+                TSTAMP_START + i * 86400 + key * 7 * 86400
+            )
+            timestring = recorded.strftime("%Y-%m-%d %H_%M_%S")
+            pickle_name = f"{sample_name}__{timestring}__thetaprobe__.pickle"
+            data = make_iss_data(
+                sample_name,
+                element,
+                O18_fraction * (1 - 0.3 * key),
+                recorded,
+                seed=int(random.integers(2**31)),
+            )
+            with open(pickle_dir / pickle_name, "wb") as f:
+                pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+            metadata["data"][str(key)] = dict(
+                raw_data_path=data.filename,
+                pickle_name=pickle_name,
+                recorded_on=ISS_SETUP["setup"],
+                datetime=recorded.strftime("%Y-%m-%d %H:%M:%S"),
+                timestamp=recorded.replace(tzinfo=datetime.timezone.utc).timestamp(),
+                comment="",
+                note="'synthetic'",
+                num_of_datasets=1,
+            )
+            metadata["custom"]["results"][str(key)] = {
+                result: {"0": None} for result in ["O16", "O18", "c_16", "c_18"]
+            }
+        write_json(metadata, leis_dir / f"{sample_name}.json")
+    return n_spectra
+
+
+def make_project(
+    project_dir,
+    n_measurements=100,
+    duration=1800,
+    seed=0,
+    write_data=True,
+    data_files=None,
+    n_leis=None,
+):
+    """Write a synthetic project with n_measurements measurements to project_dir
+
+    Each measurement has one experiment. Two out of three are standard experiments,
+    each with activity, exchange and dissolution TOFs at the start and at steady
+    state and three ICPMS samples (one in ten with an extra, duplicate, sample). The
+    rest are activity experiments, each with a few constant-current steps and an
+    activity TOF for each step. There is an elog entry for each day of measurements
+    (MEASUREMENTS_PER_DAY), a MS calibration for each 30 measurements and an ICPMS
+    calibration per element for each 50 measurements.
+
+    Args:
+        project_dir (Path-like): The folder to make the project in
+        n_measurements (int): The number of measurements (and experiments)
+        duration (float): The length of each measurement in [s]
+        seed (int): Seed for the random numbers, so that projects are reproducible
+        write_data (bool): Whether to write the fake EC-MS data files. Without them,
+            only table benchmarks (which don't load data) can be run.
+        data_files (int): The number of measurements with their own data file. The
+            data files of the rest are hard links to one of these (with the same
+            currents, but a different tstamp and name). Defaults to all.
+        n_leis (int): The number of samples to make LEIS data for. Defaults to all.
+            The LEIS data is skipped (with a warning) if pyOER.iss can't be imported.
+
+    Returns dict: The number of rows written to each table
+    """
+    random = np.random.default_rng(seed)
+    project_dir = Path(project_dir).absolute()
+    table_dir = project_dir / "tables"
+    data_dir = project_dir / DATA_FOLDER_NAME / "Data" / "ECMS"
+    dirs = {
+        table: table_dir / table
+        for table in [
+            "samples",
+            "elog",
+            "measurements",
+            "calibrations",
+            "experiments",
+            "tofs",
+            "icpms",
+        ]
+    }
+    for folder in list(dirs.values()) + [data_dir]:
+        folder.mkdir(parents=True, exist_ok=True)
+
+    # ---- samples ---- #
+    n_samples = max(1, n_measurements // 4)
+    bases = list(SAMPLE_BASES)
+    sample_names = [
+        f"{bases[i % len(bases)]}{i // len(bases) + 1}{'ABCD'[i % 4]}"
+        for i in range(n_samples)
+    ]
+    for sample_name in sample_names:
+        write_json(
+            dict(name=sample_name, synthesis_date=None, history={}),
+            dirs["samples"] / f"{sample_name}.json",
+        )
+
+    # ---- ICPMS calibrations, one per element per 50 measurements ---- #
+    ic_ids = {}  # {element: [ic_id]}
+    ic_id = 0
+    for i in range(max(1, n_measurements // 50)):
+        for element, mass in ICPMS_MASSES.items():
+            ic_id += 1
+            ic_ids.setdefault(element, []).append(ic_id)
+            ppbs = [0.01, 0.1, 1.0, 10.0, 50.0]
+            sensitivity = 4e4 * (1 + 0.1 * random.standard_normal())
+            date = get_date_string(TSTAMP_START + i * 86400)
+            write_json(
+                dict(
+                    id=ic_id,
+                    date=date,
+                    element=element,
+                    mass=mass,
+                    ppbs=ppbs,
+                    signals=[sensitivity * ppb + 5 for ppb in ppbs],
+                    wash_signals=list(5 + 2 * random.random(16)),
+                ),
+                dirs["icpms"] / f"ic{ic_id} is icpms calibration for {element} on "
+                f"{date} ",
+            )
+    write_counter(dirs["icpms"] / "LAST_ICPMS_CALIBRATION_ID.pyoer20", ic_id)
+
+    # ---- elog entries, measurements, experiments, TOFs and ICPMS points ---- #
+    elog_entries = {}  # {elog number: elog entry as dict}
+    data_file_templates = {}  # {is_standard: [mmap file]}
+    c_id = 0
+    t_id = 0
+    i_id = 0
+    for m_id in range(1, n_measurements + 1):
+        sample_name = sample_names[(m_id - 1) % n_samples]
+        element, isotope = SAMPLE_BASES[sample_name.rstrip("ABCD0123456789")]
+        tstamp = TSTAMP_START + m_id * 86400 // MEASUREMENTS_PER_DAY
+        date = get_date_string(tstamp)
+        is_standard = m_id % 3 != 0
+        category = "exchange" if is_standard else "activity"
+        name = f"m{m_id} is {sample_name} {category} on {date} by EC-MS"
+        old_data_path = data_dir / f"{m_id:05d} {sample_name} {date}.pkl"
+        if is_standard:
+            currents = [0.5 * A_EL]  # 0.5 mA/cm^2
+        else:
+            currents = list(np.round(np.logspace(-2, 0, 4) * A_EL, 5))
+
+        elog_number = 1 + (m_id - 1) // MEASUREMENTS_PER_DAY
+        if elog_number not in elog_entries:
+            elog_entries[elog_number] = dict(
+                setup="ECMS",
+                number=elog_number,
+                date=date,
+                field_data={
+                    "ID": elog_number,
+                    "Date": datetime.datetime.utcfromtimestamp(tstamp).strftime(
+                        "%a %b %d %H:%M:%S %Y"
+                    ),
+                    "Author": "Synthetic",
+                    "Project Name": "OER",
+                    "Tag": "",
+                    "Sample Name": "",
+                    "RE_vs_RHE": str(random.choice(RE_VS_RHE_STRINGS)),
+                    "Resistor": str(random.choice(RESISTOR_STRINGS)),
+                    "Chip": f"SI-3iv1-{elog_number}",
+                    "Electrolyte": "0.1 M HClO4",
+                    "pH": "1",
+                },
+                sample_measurements={},
+                measurement_EC_tags={},
+                notes=f"synthetic elog entry number {elog_number}\n",
+            )
+        elog_entry = elog_entries[elog_number]
+        if sample_name not in elog_entry["sample_measurements"]:
+            elog_entry["sample_measurements"][sample_name] = []
+            elog_entry["field_data"]["Sample Name"] = ", ".join(
+                elog_entry["sample_measurements"]
+            )
+            elog_entry["field_data"]["Tag"] = sample_name
+        EC_tag = f"{len(elog_entry['measurement_EC_tags']) + 1:02d}"
+        elog_entry["sample_measurements"][sample_name].append(EC_tag)
+        elog_entry["measurement_EC_tags"][EC_tag] = f"{category} of {sample_name}"
+        elog_entry["notes"] += f"{EC_tag}... {category} of {sample_name}\n"
+
+        write_json(
+            dict(
+                id=m_id,
+                name=name,
+                sample=sample_name,
+                technique="EC-MS",
+                isotope=isotope,
+                date=date,
+                analysis_date=None,
+                measurement_dir=str(dirs["measurements"]),
+                copied_at=None,
+                old_data_path=str(old_data_path),
+                new_data_path=str(data_dir),
+                linked_measurements=None,
+                elog_number=elog_number,
+                EC_tag=EC_tag,
+                category=category,
+            ),
+            dirs["measurements"] / f"{name}.json",
+        )
+        if write_data:
+            path_to_data = data_dir / f"{name}.mmap"
+            templates = data_file_templates.setdefault(is_standard, [])
+            if data_files is None or len(templates) < max(data_files // 2, 1):
+                write_ec_ms_data(
+                    path_to_data,
+                    name=name,
+                    tstamp=tstamp,
+                    data=make_ec_ms_data(duration, currents, seed=seed + m_id),
+                )
+                templates.append(path_to_data)
+            else:
+                link_or_copy(templates[m_id % len(templates)], path_to_data)
+
+        if m_id % 30 == 1:  # these are standard measurements
+            c_id += 1
+            cal_tspans = [[100, 220], [duration - 600, duration]]
+            write_json(
+                dict(
+                    c_id=c_id,
+                    m_id=m_id,
+                    tspan=cal_tspans[-1],
+                    cal_tspans=cal_tspans,
+                    t_bg=[10, 30],
+                    F={"O2": F_O2 * (1 + 0.02 * random.standard_normal())},
+                    alpha=0.998 if isotope == "16" else 0.98,
+                    category="good",
+                    isotope=int(isotope),
+                ),
+                dirs["calibrations"]
+                / f"c{c_id} is a good cal with {sample_name} on {date}.json",
+            )
+
+        e_id = m_id
+        experiment = dict(
+            m_id=m_id,
+            experiment_type="y" if is_standard else "a",
+            tspan_plot=[0, duration],
+            tspan_bg=[10, 30],
+            tspan_F=None,
+            tspan_cap=[20, 80],
+            V_DL=[0.45, 0.55],
+            tspan_alpha=None,
+            F=F_O2,
+            alpha=0.998 if isotope == "16" else 0.98,
+            e_id=e_id,
+        )
+        if is_standard:
+            experiment.update(plot_specs={})
+        write_json(
+            experiment,
+            dirs["experiments"] / f"e{e_id} is from m{m_id} of {sample_name}.json",
+        )
+
+        tofs = []
+        if is_standard:
+            for tof_type in ["activity", "exchange", "dissolution"]:
+                tofs.append((tof_type, [100, 220], "first 2 min"))
+                tofs.append((tof_type, [duration - 600, duration], "steady"))
+            icpms_samples = [
+                (description, min(sampling_time or duration, duration))
+                for description, sampling_time in ICPMS_SAMPLES.items()
+            ]
+            if m_id % 10 == 1:
+                description, sampling_time = icpms_samples[0]
+                icpms_samples.append((f"{description} duplicate", sampling_time))
+            for description, sampling_time in icpms_samples:
+                i_id += 1
+                signal = 1e3 * (1 + random.random())
+                write_json(
+                    dict(
+                        id=i_id,
+                        ic_id=int(random.choice(ic_ids[element])),
+                        m_id=m_id,
+                        element=element,
+                        mass=ICPMS_MASSES[element],
+                        signal=signal,
+                        dilution=50000.0,
+                        initial_volume=2e-09,
+                        sampling_time=float(sampling_time),
+                        description=description,
+                    ),
+                    dirs["icpms"] / f"i{i_id} is {element} from {sample_name} "
+                    f"{description} on {date}.json",
+                )
+        else:
+            step_length = (duration - 100) / len(currents)
+            for n in range(len(currents)):
+                t_start = 100 + n * step_length
+                tofs.append(
+                    (
+                        "activity",
+                        [t_start + step_length / 2, t_start + step_length],
+                        None,
+                    )
+                )
+        for tof_type, tspan, description in tofs:
+            t_id += 1
+            write_json(
+                dict(
+                    tof_type=tof_type,
+                    rate=None,
+                    tof=None,
+                    potential=None,
+                    current=None,
+                    e_id=e_id,
+                    tspan=[float(t) for t in tspan],
+                    r_id=None,
+                    rate_calc_kwargs={},
+                    description=description,
+                    t_id=t_id,
+                    amount=None,
+                    sample_name=sample_name,
+                    m_id=m_id,
+                    date=date,
+                    element=element,
+                ),
+                dirs["tofs"] / f"t{t_id} is {tof_type} on {sample_name} on {date}.json",
+            )
+
+    for elog_number, elog_entry in elog_entries.items():
+        write_json(
+            elog_entry, dirs["elog"] / f"ECMS {elog_number} {elog_entry['date']}.json"
+        )
+    write_json(
+        dict(c_id_list=list(range(1, c_id + 1)), tau=1e7, y0=F_O2, y1=F_O2),
+        dirs["calibrations"] / "TREND.json",
+    )
+
+    write_counter(dirs["measurements"] / "LAST_MEASUREMENT_ID.pyoer20", n_measurements)
+    write_counter(dirs["calibrations"] / "LAST_CALIBRATION_ID.pyoer20", c_id)
+    write_counter(
+        dirs["experiments"] / "LAST_EXPERIMENT_ID.pyOER20", n_measurements + 1
+    )
+    write_counter(dirs["tofs"] / "LAST_TOF_ID.pyOER20", t_id)
+    write_counter(dirs["icpms"] / "LAST_ICPMS_ID.pyoer20", i_id + 1)
+
+    try:
+        n_iss = make_leis(project_dir, sample_names, n_leis=n_leis, seed=seed)
+    except ImportError as e:
+        print(f"WARNING!!! not making LEIS data, as pyOER.iss can't be imported: {e}")
+        n_iss = 0
+
+    return dict(
+        samples=n_samples,
+        elog=len(elog_entries),
+        measurements=n_measurements,
+        calibrations=c_id,
+        experiments=n_measurements,
+        tofs=t_id,
+        icpms=i_id,
+        icpms_calibrations=ic_id,
+        leis=min(n_leis or n_samples, n_samples) if n_iss else 0,
+        iss_spectra=n_iss,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("project_dir", help="the folder to make the project in")
+    parser.add_argument("--measurements", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=1800)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-data", action="store_true", help="only write tables")
+    parser.add_argument("--data-files", type=int, default=None)
+    parser.add_argument("--leis", type=int, default=None)
+    args = parser.parse_args()
+
+    counts = make_project(
+        args.project_dir,
+        n_measurements=args.measurements,
+        duration=args.duration,
+        seed=args.seed,
+        write_data=not args.no_data,
+        data_files=args.data_files,
+        n_leis=args.leis,
+    )
+    write_json(
+        dict(arguments=vars(args), counts=counts),
+        Path(args.project_dir) / "synthetic.json",
+    )
+    print(f"made a synthetic project in {args.project_dir} with {counts}")
+    for variable, value in get_environment(args.project_dir).items():
+        print(f"{variable}={value}")
+
+
+if __name__ == "__main__":
+    main()
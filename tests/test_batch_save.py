@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from pyOER.batch_save import batch, recover, save_json, get_active_batch
+from pyOER.tools import CounterWithFile, dump_json_atomically
+
+
+def make_counter(path_to_file):
+    class Counter(CounterWithFile):
+        _file = path_to_file
+
+    return Counter()
+
+
+def read(path_to_file):
+    with open(path_to_file) as f:
+        return f.read()
+
+
+def write_leftover_journal(tmp_path):
+    """Write a journal as a batch which crashed before writing the tables would"""
+    journal_file = tmp_path / ".batch_journal.json"
+    files = [
+        [str(tmp_path / f"t{n}.json"), json.dumps({"t_id": n}, indent=4)]
+        for n in [1, 2]
+    ]
+    dump_json_atomically({"files": files}, journal_file)
+    return journal_file
+
+
+def test_leftover_journal_is_replayed_by_next_batch(tmp_path):
+    journal_file = write_leftover_journal(tmp_path)
+
+    with batch(journal_file=journal_file):
+        save_json({"t_id": 3}, tmp_path / "t3.json", indent=4)
+
+    for n in [1, 2, 3]:
+        assert json.loads(read(tmp_path / f"t{n}.json")) == {"t_id": n}
+    assert not journal_file.exists()
+
+
+def test_leftover_journal_is_replayed_by_recover(tmp_path):
+    journal_file = write_leftover_journal(tmp_path)
+
+    assert recover(journal_file) == 2
+    for n in [1, 2]:
+        assert json.loads(read(tmp_path / f"t{n}.json")) == {"t_id": n}
+    assert not journal_file.exists()
+    assert recover(journal_file) == 0
+
+
+def test_batch_writes_its_files_and_gives_back_unused_ids(tmp_path):
+    journal_file = tmp_path / ".batch_journal.json"
+    counter_file = tmp_path / "LAST_ID.pyoer20"
+    counter_file.write_text("7")
+    counter = make_counter(counter_file)
+
+    with batch(journal_file=journal_file):
+        for _ in range(3):
+            t_id = counter.id
+            save_json({"t_id": t_id}, tmp_path / f"t{t_id}.json")
+        assert not (tmp_path / "t8.json").exists()  # not until the batch is done
+
+    for n in [8, 9, 10]:
+        assert json.loads(read(tmp_path / f"t{n}.json")) == {"t_id": n}
+    assert read(counter_file) == "10"
+    assert not journal_file.exists()
+    assert get_active_batch() is None
+
+
+def test_batch_with_exception_writes_nothing_and_resets_counter(tmp_path):
+    journal_file = tmp_path / ".batch_journal.json"
+    counter_file = tmp_path / "LAST_ID.pyoer20"
+    counter_file.write_text("7")
+    counter = make_counter(counter_file)
+
+    with pytest.raises(RuntimeError):
+        with batch(journal_file=journal_file):
+            for _ in range(3):
+                t_id = counter.id
+                save_json({"t_id": t_id}, tmp_path / f"t{t_id}.json")
+            raise RuntimeError("something went wrong")
+
+    assert not list(tmp_path.glob("t*.json"))
+    assert not journal_file.exists()
+    assert read(counter_file) == "7"
+    assert get_active_batch() is None
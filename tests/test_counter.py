@@ -0,0 +1,39 @@
+from pyOER.tools import CounterWithFile
+
+
+def make_counter(path_to_file):
+    class Counter(CounterWithFile):
+        _file = path_to_file
+
+    return Counter()
+
+
+def read(path_to_file):
+    with open(path_to_file) as f:
+        return int(f.read())
+
+
+def test_release_does_not_give_back_ids_claimed_in_between(tmp_path):
+    path_to_file = tmp_path / "LAST_ID.pyoer20"
+    path_to_file.write_text("0")
+    ours, theirs = make_counter(path_to_file), make_counter(path_to_file)
+
+    assert ours.next_id(block_size=100) == 1
+    ours._block[0] = 101  # all of the first block handed out
+    assert theirs.next_id() == 101
+    assert ours.next_id(block_size=100) == 102
+    assert ours.release(first_id=1)
+    assert read(path_to_file) == 101  # 102-201 given back, but not 101 or before
+    assert theirs.next_id() == 102
+
+
+def test_release_gives_back_blocks_claimed_in_a_row(tmp_path):
+    path_to_file = tmp_path / "LAST_ID.pyoer20"
+    path_to_file.write_text("5")
+    counter = make_counter(path_to_file)
+
+    for _ in range(150):
+        counter.next_id(block_size=100)
+    assert read(path_to_file) == 205
+    assert counter.release(first_id=6)
+    assert read(path_to_file) == 5
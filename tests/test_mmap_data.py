@@ -0,0 +1,81 @@
+import numpy as np
+
+from pyOER.mmap_data import export_mmap, read_mmap, read_mmap_header, get_selection
+
+
+def make_meas(tstamp=1.6e9):
+    from ixdat import Measurement as Meas
+    from ixdat.data_series import TimeSeries, ValueSeries
+
+    t = TimeSeries("time/s", "s", np.arange(0, 100, 0.5), tstamp=tstamp + 2)
+    t_ms = TimeSeries("M32-x", "s", np.arange(0, 100, 1.5), tstamp=tstamp)
+    series_list = [
+        t,
+        ValueSeries("potential", "V", np.sin(t.data), tseries=t),
+        t_ms,
+        ValueSeries("M32", "A", np.cos(t_ms.data) * 1e-9, tseries=t_ms),
+    ]
+    return Meas.from_dict(
+        dict(name="test", technique="EC-MS", series_list=series_list, tstamp=tstamp)
+    )
+
+
+def test_export_and_read_back(tmp_path):
+    meas = make_meas()
+    path_to_file = tmp_path / "test.mmap"
+    export_mmap(meas, path_to_file)
+    meas_read = read_mmap(path_to_file)
+
+    assert meas_read.tstamp == meas.tstamp
+    for name in ["time/s", "potential", "M32-x", "M32"]:
+        assert np.array_equal(meas_read[name].data, meas[name].data)
+        assert meas_read[name].data.dtype == meas[name].data.dtype
+    assert meas_read["M32"].tseries.tstamp == meas["M32"].tseries.tstamp
+
+
+def test_read_back_in_tspans(tmp_path):
+    meas = make_meas()
+    path_to_file = tmp_path / "test.mmap"
+    export_mmap(meas, path_to_file)
+    meas_read = read_mmap(path_to_file, tspans=[[20, 30]])
+
+    t, v = meas_read.grab("potential", tspan=[20, 30])
+    t_0, v_0 = meas.grab("potential", tspan=[20, 30])
+    assert np.array_equal(t, t_0) and np.array_equal(v, v_0)
+    assert len(meas_read["potential"].data) < len(meas["potential"].data)
+
+
+def test_get_selection_keeps_a_point_on_each_side():
+    t = np.arange(10.0)  # 0, 1, ..., 9
+
+    assert get_selection(t, [[2.5, 5.5]]) == [slice(2, 7)]  # t = 2 to 6
+    assert get_selection(t, [[3, 5]]) == [slice(2, 7)]  # points at the ends too
+    assert get_selection(t, [[0, 2]]) == [slice(0, 4)]  # at the start of the data
+    assert get_selection(t, [[-5, 2]]) == [slice(0, 4)]  # before the start
+    assert get_selection(t, [[8, 9]]) == [slice(7, 10)]  # at the end of the data
+    assert get_selection(t, [[7.5, 20]]) == [slice(7, 10)]  # beyond the end
+    assert get_selection(t, [[20, 30]]) == [slice(9, 10)]  # all after the data
+    assert get_selection(t, [[1, 2], [7, 8], [2.5, 3]]) == [slice(0, 5), slice(6, 10)]
+    mask = get_selection(t[::-1], [[3, 5]], is_sorted=False)
+    assert list(t[::-1][mask]) == [5, 4, 3]
+
+
+def test_read_mmap_header_without_the_data(tmp_path):
+    meas = make_meas(tstamp=1.6e9)
+    path_to_file = tmp_path / "test.mmap"
+    export_mmap(meas, path_to_file)
+
+    # only the start of the file, up to the end of the header, is needed:
+    contents = path_to_file.read_bytes()
+    header_end = 16 + int.from_bytes(contents[8:16], "little")
+    path_to_header = tmp_path / "header_only.mmap"
+    path_to_header.write_bytes(contents[:header_end])
+
+    header = read_mmap_header(path_to_header)
+    assert header["tstamp"] == 1.6e9
+    assert [spec["name"] for spec in header["series"]] == [
+        "time/s",
+        "M32-x",
+        "potential",
+        "M32",
+    ]